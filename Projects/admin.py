@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Project, Bid
+from .models import Project, Bid, ProjectSkill
 
 admin.site.register(Project)
-admin.site.register(Bid)
\ No newline at end of file
+admin.site.register(Bid)
+admin.site.register(ProjectSkill)
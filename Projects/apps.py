@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    from django.db import connections
+    from .search import install_search_index
+    install_search_index(connections[using])
 
 
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Projects'
+
+    def ready(self):
+        # Register the signal handlers that keep denormalized columns in sync
+        from . import signals  # noqa: F401
+
+        # SQLite table rebuilds in migrations drop the FTS triggers; put them back
+        post_migrate.connect(ensure_search_index, sender=self)
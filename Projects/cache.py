@@ -0,0 +1,94 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from api.caches import cache_is_shared
+from api.metrics import count_cache_lookup, registry
+
+
+CATALOG_VERSION_KEY = 'projects:catalog-version'
+
+
+def list_cache_settings():
+    options = {'ENABLED': True, 'TIMEOUT': 300, 'LOCAL_TIMEOUT': 5, 'MAX_PAGE': 3}
+    options.update(getattr(settings, 'PROJECT_LIST_CACHE', {}))
+    return options
+
+
+def list_cache_timeout():
+    """
+    Seconds a cached page is kept. With a per-process cache backend a write only
+    bumps the catalog version of the worker that handled it, so pages are kept
+    for ``LOCAL_TIMEOUT`` instead: the other workers serve them at most that stale.
+    """
+    options = list_cache_settings()
+    if cache_is_shared():
+        return options['TIMEOUT']
+    return min(options['TIMEOUT'], options['LOCAL_TIMEOUT'])
+
+
+def catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost key can never bring back an old version
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached project list at once by moving to a new version."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), None)
+
+
+def list_cache_key(request):
+    """
+    Cache key for a project list request, or None if it should not be cached.
+
+    Only the first few pages are cached. Parameters are canonicalized so that
+    ``?budget=1-5&project_type=a,b`` and ``?project_type=a,b&budget=1-5`` share an entry.
+    """
+    if not list_cache_settings()['ENABLED']:
+        return None
+    params = request.query_params
+    try:
+        page = int(params.get('page', 1))
+    except ValueError:
+        return None
+    if page > list_cache_settings()['MAX_PAGE'] or params.get('cursor'):
+        return None
+
+    canonical = '&'.join(
+        f'{name}={",".join(sorted(values))}' for name, values in sorted(params.lists())
+    )
+    digest = hashlib.md5(f'{request.scheme}://{request.get_host()}?{canonical}'.encode()).hexdigest()
+    return f'projects:list:{catalog_version()}:{digest}'
+
+
+def get_cached_list(key):
+    data = cache.get(key)
+    count_cache_lookup('project_list', hit=data is not None)
+    return data
+
+
+def set_cached_list(key, data):
+    cache.set(key, data, list_cache_timeout())
+
+
+def list_cache_stats():
+    """Hits and misses over every worker, from the metrics registry (see api/metrics.py)."""
+    counters, _ = registry.collect()
+    lookups = {'hit': 0, 'miss': 0}
+    for (name, labels), value in counters.items():
+        labels = dict(labels)
+        if name == 'cache_requests_total' and labels.get('cache') == 'project_list':
+            lookups[labels['result']] += value
+    total = lookups['hit'] + lookups['miss']
+    return {
+        'hits': lookups['hit'],
+        'misses': lookups['miss'],
+        'hit_ratio': round(lookups['hit'] / total, 4) if total else 0.0,
+    }
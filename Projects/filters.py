@@ -0,0 +1,140 @@
+from functools import lru_cache
+from urllib.parse import urlencode
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from .models import OwnerStats
+
+
+class ListFilter:
+    """Comma separated values matched with ``__in``, e.g. ``?project_type=freelancer,exchange``."""
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+
+    def parse(self, raw):
+        values = sorted({value.strip() for value in raw.split(',') if value.strip()})
+        return tuple(values) or None
+
+    def compile(self, values):
+        return Q(**{f'{self.lookup}__in': values})
+
+
+class ExactFilter:
+    """A single value matched exactly, e.g. ``?country=Egypt``."""
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+
+    def parse(self, raw):
+        return raw.strip() or None
+
+    def compile(self, value):
+        return Q(**{self.lookup: value})
+
+
+class RangeFilter:
+    """
+    Comma separated integer ranges OR'ed together, e.g. ``?proposals=0-5,20+``.
+
+    Each range is ``min-max``, ``min+`` (open ended) or a single value.
+    ``scale`` converts the client's unit into the stored one (months to days).
+    """
+
+    def __init__(self, lookup, scale=1, multiple=True):
+        self.lookup = lookup
+        self.scale = scale
+        self.multiple = multiple
+
+    def parse(self, raw):
+        ranges = [part.strip() for part in raw.split(',') if part.strip()]
+        if not ranges:
+            return None
+        if not self.multiple and len(ranges) > 1:
+            raise ValueError
+        return tuple(sorted({self.parse_range(part) for part in ranges}, key=lambda r: (r[0], r[1] is None, r[1])))
+
+    def parse_range(self, part):
+        if part.endswith('+'):
+            return self.convert(int(part[:-1])), None
+        if '-' in part:
+            low, high = map(int, part.split('-'))
+            if low > high:
+                raise ValueError
+            return self.convert(low), self.convert(high)
+        value = self.convert(int(part))
+        return value, value
+
+    def convert(self, value):
+        if value < 0:
+            raise ValueError
+        return round(value * self.scale) if self.scale != 1 else value
+
+    def compile(self, ranges):
+        condition = Q()
+        for low, high in ranges:
+            bounds = {f'{self.lookup}__gte': low}
+            if high is not None:
+                bounds[f'{self.lookup}__lte'] = high
+            condition |= Q(**bounds)
+        return condition
+
+
+class OwnerStatsRangeFilter(RangeFilter):
+    """A RangeFilter on an OwnerStats counter, applied as an indexed semi-join on the owner."""
+
+    def compile(self, ranges):
+        return Q(owner__in=OwnerStats.objects.filter(super().compile(ranges)).values('user_id'))
+
+
+class ProjectFilterSet:
+    """
+    The filters shared by every project list endpoint.
+
+    Query parameters are parsed once into a normalized spec; the spec is then
+    compiled into a single WHERE clause and the compiled plan is cached by the
+    spec's canonical form.
+    """
+    filters = {
+        'project_type': ListFilter('type'),
+        'experience_level': ListFilter('experience_level'),
+        'budget': RangeFilter('budget', multiple=False),
+        'country': ExactFilter('owner__country'),
+        'proposals': RangeFilter('bid_count'),
+        'project_length': RangeFilter('duration', scale=30.44),
+        'client_history': OwnerStatsRangeFilter('completed_projects'),
+    }
+
+    def __init__(self, query_params):
+        self.spec = self.parse(query_params)
+
+    @classmethod
+    def parse(cls, query_params):
+        spec = []
+        for name, project_filter in cls.filters.items():
+            raw = query_params.get(name)
+            if not raw:
+                continue
+            try:
+                value = project_filter.parse(raw)
+            except ValueError:
+                raise ValidationError({'error': f'Invalid value for {name}: {raw}'})
+            if value is not None:
+                spec.append((name, value))
+        return tuple(spec)
+
+    @property
+    def canonical(self):
+        return urlencode([(name, repr(value)) for name, value in self.spec])
+
+    def filter_queryset(self, queryset):
+        if not self.spec:
+            return queryset
+        return queryset.filter(compile_spec(self.spec))
+
+
+@lru_cache(maxsize=256)
+def compile_spec(spec):
+    condition = Q()
+    for name, value in spec:
+        condition &= ProjectFilterSet.filters[name].compile(value)
+    return condition
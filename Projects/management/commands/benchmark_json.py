@@ -0,0 +1,53 @@
+import io
+from itertools import cycle, islice
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from Projects.models import Project
+from Projects.serializers import ProjectSerializer
+from Users.models import CustomUser
+from Users.serializers import CustomUserSerializer
+from .benchmark_serializers import best_of
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON encoding and decoding of a project page and a full user profile across the JSON backends.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Projects in the simulated page.')
+        parser.add_argument('--repeat', type=int, default=50, help='Runs per measurement; the fastest is reported.')
+
+    def payloads(self, page_size):
+        projects = ProjectSerializer(Project.objects.select_related('owner', 'owner__owner_stats')[:page_size], many=True).data
+        user = CustomUser.objects.order_by('id').first()
+        if not projects or user is None:
+            raise CommandError('Benchmarks need at least one project and one user in the database.')
+        # Repeat the available rows up to a full page
+        page = {'count': page_size, 'next': None, 'previous': None, 'results': list(islice(cycle(projects), page_size))}
+        return {f'{page_size}-project page': page, 'user profile': CustomUserSerializer(user).data}
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        stdlib = FastJSONRenderer()
+        stdlib.use_orjson = False
+        fast = FastJSONRenderer()
+        self.stdout.write(f"orjson: {'installed' if orjson is not None else 'not installed'}")
+
+        for name, payload in self.payloads(options['page_size']).items():
+            body = JSONRenderer().render(payload)
+            results = {
+                'DRF render': best_of(repeat, lambda: JSONRenderer().render(payload)),
+                'stdlib render': best_of(repeat, lambda: stdlib.render(payload)),
+                'fast render': best_of(repeat, lambda: fast.render(payload)),
+                'DRF parse': best_of(repeat, lambda: JSONParser().parse(io.BytesIO(body))),
+                'fast parse': best_of(repeat, lambda: FastJSONParser().parse(io.BytesIO(body))),
+            }
+            self.stdout.write(f'{name} ({len(body)} bytes, best of {repeat}):')
+            for label, seconds in results.items():
+                self.stdout.write(f'  {label:<16} {seconds * 1e6:9.1f} us')
+            self.stdout.write(self.style.SUCCESS(
+                f"  render {results['DRF render'] / results['fast render']:.1f}x, "
+                f"parse {results['DRF parse'] / results['fast parse']:.1f}x faster"
+            ))
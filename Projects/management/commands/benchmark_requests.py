@@ -0,0 +1,92 @@
+import json
+import statistics
+import time
+from contextlib import ExitStack
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import CaptureQueriesContext
+from api.workload import Workload
+
+
+def percentile(timings, percent):
+    return statistics.quantiles(timings, n=100, method='inclusive')[percent - 1] if len(timings) > 1 else timings[0]
+
+
+def count_queries(workload, method, path, params):
+    """Queries one request runs, over every database alias."""
+    with ExitStack() as stack:
+        captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+        workload.call(method, path, params)
+    return sum(len(context) for context in captured)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time requests to every endpoint through the full WSGI stack against the configured database and report '
+        'latency percentiles and query counts. Run it once per DATABASE_URL / DATABASE_CONN_MAX_AGE setting (or '
+        'after generate_data at several scales) and compare the --json output of the runs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint.')
+        parser.add_argument('--endpoint', action='append', help='Only endpoints whose label contains this text.')
+        parser.add_argument('--json', action='store_true', help='Print a JSON report instead of a table.')
+
+    def handle(self, *args, **options):
+        try:
+            workload = Workload()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        opened = []
+        connection_created.connect(lambda sender, connection, **kwargs: opened.append(connection.alias), weak=False)
+        connections.close_all()
+
+        db = connection.settings_dict
+        pooled = bool(db.get('OPTIONS', {}).get('pool'))
+        report = {
+            'database': {'vendor': connection.vendor, 'conn_max_age': db['CONN_MAX_AGE'], 'pool': pooled},
+            'requests': options['requests'],
+            'endpoints': [],
+        }
+        if not options['json']:
+            self.stdout.write(f"{connection.vendor}: CONN_MAX_AGE={db['CONN_MAX_AGE']}, pool={'on' if pooled else 'off'}")
+
+        for label, method, path, params in workload.requests():
+            if options['endpoint'] and not any(text in label for text in options['endpoint']):
+                continue
+            for _ in range(options['warmup']):
+                workload.call(method, path, params)
+            # Counted on an untimed request: capturing forces the debug cursor
+            queries = count_queries(workload, method, path, params)
+            del opened[:]
+            timings = []
+            for _ in range(options['requests']):
+                start = time.perf_counter()
+                status = workload.call(method, path, params)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            result = {
+                'label': label,
+                'method': method.upper(),
+                'path': path,
+                'status': int(status.split()[0]),
+                'queries': queries,
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'connections_opened': len(opened),
+            }
+            report['endpoints'].append(result)
+            if not options['json']:
+                self.stdout.write(
+                    f"  {label:<28} {status:<8} {queries:3d} queries  mean {result['mean_ms']:7.2f} ms  "
+                    f"p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms  "
+                    f"connections opened {len(opened)}"
+                )
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,61 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api.compiled import compile_serializer
+from Projects.models import Bid, Project
+from Projects.serializers import BidSerializer, ProjectSerializer
+
+
+# List endpoint -> (queryset as the view builds it, serializer class)
+TARGETS = {
+    'projects': (lambda: Project.objects.select_related('owner', 'owner__owner_stats'), ProjectSerializer),
+    'bids': (lambda: Bid.objects.select_related('user', 'project'), BidSerializer),
+}
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = 'Compare the per-item cost of the DRF serializers and their compiled values() form on the list endpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Rows per simulated page.')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement; the fastest is reported.')
+        parser.add_argument('--target', choices=sorted(TARGETS), action='append', help='Endpoint to measure (default: all).')
+
+    def handle(self, *args, **options):
+        limit, repeat = options['limit'], options['repeat']
+        for name in options['target'] or sorted(TARGETS):
+            make_queryset, serializer_class = TARGETS[name]
+            compiled = compile_serializer(serializer_class())
+            if compiled is None:
+                raise CommandError(f'{serializer_class.__name__} cannot be compiled.')
+
+            objects = list(make_queryset()[:limit])
+            rows = list(make_queryset().values(*compiled.paths)[:limit])
+            if not objects:
+                self.stdout.write(self.style.WARNING(f'{name}: no rows to measure.'))
+                continue
+            count = len(objects)
+
+            results = {
+                'drf fetch': best_of(repeat, lambda: list(make_queryset()[:limit])),
+                'drf serialize': best_of(repeat, lambda: serializer_class(objects, many=True).data),
+                'compiled fetch': best_of(repeat, lambda: list(make_queryset().values(*compiled.paths)[:limit])),
+                'compiled serialize': best_of(repeat, lambda: compiled.many(rows)),
+            }
+            self.stdout.write(f'{name} ({count} rows, best of {repeat}):')
+            for label, seconds in results.items():
+                self.stdout.write(f'  {label:<20} {seconds / count * 1e6:9.1f} us/item')
+
+            drf = results['drf fetch'] + results['drf serialize']
+            fast = results['compiled fetch'] + results['compiled serialize']
+            self.stdout.write(self.style.SUCCESS(
+                f'  total {drf / count * 1e6:.1f} -> {fast / count * 1e6:.1f} us/item ({drf / fast:.1f}x)'
+            ))
@@ -0,0 +1,65 @@
+from contextlib import ExitStack
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from api.explain import explain, normalize, plan_problems, suggest_index
+from api.workload import Workload
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay representative requests against every endpoint, EXPLAIN the SELECTs they run and flag '
+        'full table scans and index-less sorts, with a candidate index for each.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', help='Only endpoints whose label contains this text.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the plan of every query, not only flagged ones.')
+
+    def handle(self, *args, **options):
+        try:
+            workload = Workload()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        flagged = 0
+        suggestions = {}
+        # Bypass the response and counter caches so every request reaches the database
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            for label, method, path, params in workload.requests():
+                if options['endpoint'] and not any(text in label for text in options['endpoint']):
+                    continue
+                with ExitStack() as stack:
+                    captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                    status = workload.call(method, path, params)
+
+                queries = {}
+                for context in captured:
+                    for query in context.captured_queries:
+                        sql = query['sql']
+                        if sql.lstrip().upper().startswith('SELECT'):
+                            queries.setdefault(normalize(sql), (context.connection, sql))
+
+                self.stdout.write(f'{label} ({status}, {len(queries)} distinct SELECTs)')
+                for conn, sql in queries.values():
+                    plan = explain(conn, sql)
+                    if plan is None:
+                        continue
+                    problems = plan_problems(conn.vendor, plan, sql)
+                    if not problems and not options['verbose_plans']:
+                        continue
+
+                    style = self.style.WARNING if problems else str
+                    self.stdout.write(style(f'  {sql[:300]}'))
+                    for line in plan:
+                        self.stdout.write(f'      {line}')
+                    for kind, table in problems:
+                        flagged += 1
+                        self.stdout.write(self.style.WARNING(f"    ! {'full scan of ' + table if kind == 'scan' else 'sort without an index'}"))
+                        suggestion = suggest_index(sql, table)
+                        if suggestion:
+                            suggestions[suggestion] = suggestions.get(suggestion, 0) + 1
+
+        self.stdout.write(self.style.SUCCESS(f'{flagged} problems flagged.'))
+        for suggestion, count in sorted(suggestions.items(), key=lambda item: -item[1]):
+            self.stdout.write(f'  {suggestion}  ({count} queries)')
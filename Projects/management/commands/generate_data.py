@@ -0,0 +1,314 @@
+import itertools
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from Projects.cache import bump_catalog_version
+from Projects.models import Bid, Project, ProjectSkill, normalize_skill
+from Users.ledger import month_start
+from Users.models import BalanceCheckpoint, CustomUser, Message, Notification, Transaction, TransactionRollup
+
+
+# The head of the skill vocabulary; the long tail is filled with "skill <n>"
+COMMON_SKILLS = [
+    'Python', 'JavaScript', 'React', 'Django', 'SQL', 'Figma', 'Copywriting', 'SEO', 'Node.js', 'TypeScript',
+    'Photoshop', 'Illustrator', 'Video Editing', 'Data Analysis', 'Machine Learning', 'Excel', 'Translation',
+    'Marketing', 'Go', 'Rust', 'Java', 'Kotlin', 'Swift', 'Flutter', 'Vue', 'Angular', 'PostgreSQL', 'Docker',
+    'Kubernetes', 'AWS', 'UX Research', 'Branding', '3D Modeling', 'Animation', 'Accounting', 'Voice Over',
+    'Technical Writing', 'Project Management', 'WordPress', 'Shopify',
+]
+ADJECTIVES = ['Quick', 'Small', 'Ongoing', 'Urgent', 'Long-term', 'Simple', 'Complex', 'Remote', 'Weekend', 'Pilot']
+NOUNS = ['fix', 'landing page', 'integration', 'audit', 'prototype', 'redesign', 'migration', 'dashboard', 'campaign', 'review']
+COUNTRIES = ['US', 'GB', 'DE', 'IN', 'BR', 'NG', 'PH', 'FR', 'CA', 'ES']
+
+STATUS_WEIGHTS = {'open': 60, 'in_progress': 25, 'closed': 15}
+OPENING_BALANCES = {'spark': 100, 'ember': 0}  # The CustomUser.sparks / credits defaults
+
+
+class Zipf:
+    """Draws ``items`` with the item at rank r picked with probability proportional to 1 / r ** exponent."""
+
+    def __init__(self, items, exponent):
+        self.items = list(items)
+        self.cum_weights = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, len(self.items) + 1)))
+
+    def draw(self, rng):
+        return rng.choices(self.items, cum_weights=self.cum_weights)[0]
+
+    def sample(self, rng, k):
+        """Up to ``k`` distinct items, popular ones first in line."""
+        k = min(k, len(self.items))
+        picked = {}
+        while len(picked) < k:
+            for item in rng.choices(self.items, cum_weights=self.cum_weights, k=k):
+                picked.setdefault(item)
+        return list(picked)[:k]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at / updated_at values it is given instead of stamping now()."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def count_around(rng, mean, limit):
+    # Exponentially distributed: most rows get a few children, some get many
+    return min(round(rng.expovariate(1 / mean)), limit) if mean > 0 else 0
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-generate synthetic users, projects, bids, notifications, transactions and messages for load testing, '
+        'e.g. --users 100000 --projects 1000000 --bids 10000000. Skills follow a Zipfian distribution. '
+        'Signals are bypassed, so the derived tables (skill index, bid counts, owner stats, balance checkpoints, '
+        'rollups, conversations) are written or rebuilt afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to create.')
+        parser.add_argument('--projects', type=int, default=5000, help='Projects to create.')
+        parser.add_argument('--bids', type=int, default=25000, help='Approximate number of bids to create.')
+        parser.add_argument('--notifications', type=int, default=10, help='Average notifications per user.')
+        parser.add_argument('--transactions', type=int, default=10, help='Average transactions per user.')
+        parser.add_argument('--messages', type=int, default=10, help='Average messages sent per user.')
+        parser.add_argument('--saved', type=int, default=3, help='Average saved projects per user.')
+        parser.add_argument('--skills', type=int, default=500, help='Size of the skill vocabulary.')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Exponent of the skill and project owner distributions.')
+        parser.add_argument('--days', type=int, default=365, help='Spread creation times over this many past days.')
+        parser.add_argument('--prefix', default='gen', help='Username / email prefix of the generated users.')
+        parser.add_argument('--password', default='password', help='Password of every generated user.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert and transaction.')
+        parser.add_argument('--seed', type=int, help='Random seed, for reproducible data sets.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('At least two users are needed (owners cannot bid on their own projects).')
+
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.batch_size = options['batch_size']
+        vocabulary = COMMON_SKILLS + [f'skill {n}' for n in range(len(COMMON_SKILLS), options['skills'])]
+        self.skills = Zipf(vocabulary[:max(options['skills'], 1)], options['zipf'])
+
+        with explicit_timestamps(CustomUser, Project, Bid, Notification, Transaction, Message, BalanceCheckpoint):
+            self.step('users', self.create_users)
+            self.owners = Zipf(self.rng.sample(self.user_ids, len(self.user_ids)), options['zipf'])
+            self.step('projects and bids', self.create_projects)
+            self.step('notifications', self.create_notifications)
+            self.step('messages', self.create_messages)
+
+        call_command('rebuild_owner_stats', stdout=self.stdout)
+        call_command('rebuild_conversations', stdout=self.stdout)
+        bump_catalog_version()
+
+    def step(self, name, func):
+        start = time.perf_counter()
+        created = func()
+        self.stdout.write(f'{name}: {created} rows in {time.perf_counter() - start:.1f}s')
+
+    def moment(self, after=None):
+        """A random past time, after ``after`` when given."""
+        earliest = after or self.now - timedelta(days=self.options['days'])
+        return earliest + (self.now - earliest) * self.rng.random()
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def create_users(self):
+        """Users with their transactions, opening checkpoints, rollups and matching cached balances."""
+        rng, prefix = self.rng, self.options['prefix']
+        password = make_password(self.options['password'])
+        first_id = (CustomUser.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        self.user_ids = []
+        created = 0
+
+        for batch in self.batches(self.options['users']):
+            users, ledgers = [], []
+            for n in batch:
+                joined = self.moment()
+                ledger = self.ledger_entries(joined)
+                balances = dict(OPENING_BALANCES)
+                for entry in ledger:
+                    balances[entry.currency] += entry.signed_amount
+                users.append(CustomUser(
+                    username=f'{prefix}{first_id + n}',
+                    email=f'{prefix}{first_id + n}@example.com',
+                    password=password,
+                    first_name=f'User{first_id + n}',
+                    user_title=f'{self.skills.draw(rng)} specialist',
+                    country=rng.choice(COUNTRIES),
+                    skills=self.skills.sample(rng, rng.randint(1, 8)),
+                    interests=self.skills.sample(rng, rng.randint(0, 3)),
+                    sparks=balances['spark'],
+                    credits=balances['ember'],
+                    date_joined=joined,
+                    updated_at=joined,
+                ))
+                ledgers.append(ledger)
+
+            with transaction.atomic():
+                users = CustomUser.objects.bulk_create(users)
+                checkpoints, entries = [], []
+                for user, ledger in zip(users, ledgers):
+                    self.user_ids.append(user.id)
+                    checkpoints.extend(
+                        BalanceCheckpoint(user=user, currency=currency, balance=balance, created_at=user.date_joined)
+                        for currency, balance in OPENING_BALANCES.items()
+                    )
+                    for entry in ledger:
+                        entry.user = user
+                        entries.append(entry)
+                BalanceCheckpoint.objects.bulk_create(checkpoints)
+                Transaction.objects.bulk_create(entries)
+                TransactionRollup.objects.bulk_create(self.rollups(entries))
+            created += len(users) + len(checkpoints) + len(entries)
+        return created
+
+    def ledger_entries(self, joined):
+        """Chronological transactions for a new user; payments never overdraw the balance."""
+        rng = self.rng
+        balances = dict(OPENING_BALANCES)
+        times = sorted(self.moment(joined) for _ in range(count_around(rng, self.options['transactions'], 1000)))
+        entries = []
+        for created_at in times:
+            currency = 'spark' if rng.random() < 0.7 else 'ember'
+            amount = rng.randint(1, 50)
+            kind = 'payment' if rng.random() < 0.4 and balances[currency] >= amount else 'received'
+            balances[currency] += -amount if kind == 'payment' else amount
+            entries.append(Transaction(
+                currency=currency, amount=amount, type=kind, description=f'Synthetic {kind}', created_at=created_at,
+            ))
+        return entries
+
+    def rollups(self, entries):
+        totals = defaultdict(lambda: {'received': 0, 'paid': 0, 'count': 0})
+        for entry in entries:
+            row = totals[entry.user_id, entry.currency, month_start(entry.created_at)]
+            row['paid' if entry.type == 'payment' else 'received'] += entry.amount
+            row['count'] += 1
+        return [
+            TransactionRollup(user_id=user_id, currency=currency, month=month, **row)
+            for (user_id, currency, month), row in totals.items()
+        ]
+
+    def create_projects(self):
+        """Projects with their skill index rows, bids (and bid counts) and savers."""
+        rng, options = self.rng, self.options
+        users = self.user_ids
+        bids_per_project = options['bids'] / max(options['projects'], 1)
+        savers_per_project = options['saved'] * len(users) / max(options['projects'], 1)
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        Saved = CustomUser.saved_projects.through
+        created = 0
+
+        for batch in self.batches(options['projects']):
+            projects, bidders = [], []
+            for n in batch:
+                owner = self.owners.draw(rng)
+                skills = self.skills.sample(rng, rng.randint(1, 5))
+                # One extra draw so the owner can be dropped and the count still holds
+                candidates = rng.sample(users, min(count_around(rng, bids_per_project, len(users) - 1) + 1, len(users)))
+                project_bidders = [user_id for user_id in candidates if user_id != owner][:len(candidates) - 1]
+                status = rng.choices(statuses, weights)[0]
+                created_at = self.moment()
+                projects.append(Project(
+                    title=f'{rng.choice(ADJECTIVES)} {skills[0]} {rng.choice(NOUNS)} #{n}',
+                    description=f"Looking for help with {', '.join(skills)}. {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}.",
+                    skills_needed=skills,
+                    budget=rng.choice([50, 100, 250, 500, 1000, 2500, 5000, 10000]),
+                    duration=rng.randint(1, 90),
+                    bid_amount=rng.randint(0, 40),
+                    status=status,
+                    owner_id=owner,
+                    assigned_to_id=(project_bidders[0] if project_bidders else None) if status != 'open' else None,
+                    type=rng.choice(['freelancer', 'freelancer', 'exchange']),
+                    experience_level=rng.choice([None, 'beginner', 'intermediate', 'expert']),
+                    bid_count=len(project_bidders),
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+                bidders.append(project_bidders)
+
+            with transaction.atomic():
+                projects = Project.objects.bulk_create(projects)
+                skill_rows, bids, saves = [], [], []
+                for project, project_bidders in zip(projects, bidders):
+                    skill_rows.extend(
+                        ProjectSkill(project=project, skill=skill)
+                        for skill in {normalize_skill(skill) for skill in project.skills_needed}
+                    )
+                    bids.extend(
+                        Bid(
+                            project=project, user_id=user_id, proposal=f'I can start on {project.title} right away.',
+                            amount=max(1, int(project.budget * rng.uniform(0.5, 1.2))), duration=rng.randint(1, 90),
+                            created_at=self.moment(project.created_at),
+                        )
+                        for user_id in project_bidders
+                    )
+                    savers = rng.sample(users, min(count_around(rng, savers_per_project, len(users)), len(users)))
+                    saves.extend(Saved(customuser_id=user_id, project_id=project.id) for user_id in savers)
+                ProjectSkill.objects.bulk_create(skill_rows)
+                Bid.objects.bulk_create(bids, batch_size=self.batch_size)
+                Saved.objects.bulk_create(saves, batch_size=self.batch_size)
+            created += len(projects) + len(skill_rows) + len(bids) + len(saves)
+        return created
+
+    def create_notifications(self):
+        rng = self.rng
+        created = 0
+        for batch in self.batches(len(self.user_ids)):
+            notifications = []
+            for index in batch:
+                for _ in range(count_around(rng, self.options['notifications'], 1000)):
+                    created_at = self.moment()
+                    is_read = rng.random() < 0.5
+                    kind = rng.choice(['message', 'project', 'bid'])
+                    notifications.append(Notification(
+                        user_id=self.user_ids[index], type=kind, url=f'https://example.com/{kind}s/',
+                        message=f'Synthetic {kind} notification', created_at=created_at,
+                        is_read=is_read, read_at=self.moment(created_at) if is_read else None,
+                    ))
+            with transaction.atomic():
+                Notification.objects.bulk_create(notifications)
+            created += len(notifications)
+        return created
+
+    def create_messages(self):
+        """Messages between a handful of contacts per user; conversations are rebuilt from them afterwards."""
+        rng = self.rng
+        created = 0
+        for batch in self.batches(len(self.user_ids)):
+            messages = []
+            for index in batch:
+                sender = self.user_ids[index]
+                contacts = [user_id for user_id in rng.sample(self.user_ids, min(4, len(self.user_ids))) if user_id != sender]
+                for _ in range(count_around(rng, self.options['messages'], 1000)):
+                    messages.append(Message(
+                        sender_id=sender, receiver_id=rng.choice(contacts),
+                        message=f'About the {rng.choice(NOUNS)}: {rng.choice(ADJECTIVES).lower()} update.',
+                        created_at=self.moment(),
+                    ))
+            with transaction.atomic():
+                Message.objects.bulk_create(messages)
+            created += len(messages)
+        return created
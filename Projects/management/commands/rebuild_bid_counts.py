@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from Projects.models import Bid, Project
+
+
+class Command(BaseCommand):
+    help = 'Recompute Project.bid_count from the Bid table.'
+
+    def handle(self, *args, **options):
+        bids = (
+            Bid.objects.filter(project=OuterRef('pk'))
+            .order_by()
+            .values('project')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        updated = Project.objects.update(bid_count=Coalesce(Subquery(bids), Value(0)))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt bid counts for {updated} projects.'))
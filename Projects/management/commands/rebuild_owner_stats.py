@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from Projects.stats import rebuild_owner_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the OwnerStats counters from the Project and Bid tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users recomputed per query batch.')
+
+    def handle(self, *args, **options):
+        total = rebuild_owner_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt owner stats for {total} users.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+from Projects.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = 'Create the project full-text search index and repopulate it from the Project table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to rebuild.')
+
+    def handle(self, *args, **options):
+        install_search_index(connections[options['database']], rebuild=True)
+        self.stdout.write(self.style.SUCCESS('Project search index rebuilt.'))
@@ -0,0 +1,28 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from api.db import copy_sqlite
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary into the SQLite replicas, standing in for replication in local runs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Repeat every N seconds (simulated replication lag); 0 copies once.')
+
+    def handle(self, *args, **options):
+        primary = connections['default'].settings_dict
+        replicas = [connections[alias].settings_dict for alias in settings.DATABASE_REPLICAS]
+        if not replicas:
+            raise CommandError('No replicas configured; set DATABASE_REPLICA_URLS.')
+        if any(db['ENGINE'] != 'django.db.backends.sqlite3' for db in [primary, *replicas]):
+            raise CommandError("sync_replica only copies SQLite files; use the database's own replication otherwise.")
+
+        while True:
+            for alias, replica in zip(settings.DATABASE_REPLICAS, replicas):
+                copy_sqlite(primary['NAME'], replica['NAME'])
+                self.stdout.write(self.style.SUCCESS(f'Copied {primary["NAME"]} to {alias} ({replica["NAME"]}).'))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-16 20:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_bid_counts(apps, schema_editor):
+    Project = apps.get_model('Projects', 'Project')
+    Bid = apps.get_model('Projects', 'Bid')
+    bids = (
+        Bid.objects.filter(project=OuterRef('pk'))
+        .order_by()
+        .values('project')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Project.objects.update(bid_count=Coalesce(Subquery(bids), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Projects', '0014_alter_project_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_bid_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from Projects.search import install_search_index
+    install_search_index(schema_editor.connection, rebuild=True)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS projects_project_fts_{suffix}')
+            cursor.execute('DROP TABLE IF EXISTS projects_project_fts')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS projects_project_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Projects', '0015_project_bid_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
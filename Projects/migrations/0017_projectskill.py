@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-16 20:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_project_skills(apps, schema_editor):
+    Project = apps.get_model('Projects', 'Project')
+    ProjectSkill = apps.get_model('Projects', 'ProjectSkill')
+    rows = []
+    for project_id, skills_needed in Project.objects.values_list('id', 'skills_needed').iterator():
+        skills = {' '.join(str(skill).split()).lower()[:100] for skill in skills_needed or [] if str(skill).strip()}
+        rows.extend(ProjectSkill(project_id=project_id, skill=skill) for skill in skills)
+    ProjectSkill.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Projects', '0016_project_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.CharField(max_length=100)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_index', to='Projects.project')),
+            ],
+            options={
+                'unique_together': {('skill', 'project')},
+            },
+        ),
+        migrations.RunPython(backfill_project_skills, migrations.RunPython.noop),
+    ]
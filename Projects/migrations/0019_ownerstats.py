@@ -0,0 +1,57 @@
+# Generated by Django 5.1 on 2026-10-16 20:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_owner_stats(apps, schema_editor):
+    CustomUser = apps.get_model('Users', 'CustomUser')
+    Project = apps.get_model('Projects', 'Project')
+    Bid = apps.get_model('Projects', 'Bid')
+    OwnerStats = apps.get_model('Projects', 'OwnerStats')
+
+    stats = {user_id: OwnerStats(user_id=user_id) for user_id in CustomUser.objects.values_list('id', flat=True)}
+    projects = Project.objects.order_by().values('owner').annotate(
+        total=Count('id'),
+        open=Count('id', filter=Q(status='open')),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        closed=Count('id', filter=Q(status='closed')),
+    )
+    for row in projects:
+        row_stats = stats[row['owner']]
+        row_stats.total_projects = row['total']
+        row_stats.open_projects = row['open']
+        row_stats.in_progress_projects = row['in_progress']
+        row_stats.completed_projects = row['closed']
+    for row in Bid.objects.order_by().values('project__owner').annotate(total=Count('id')):
+        stats[row['project__owner']].total_bids_received = row['total']
+
+    OwnerStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Projects', '0018_project_created_id_idx'),
+        ('Users', '0028_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnerStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='owner_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('completed_projects', models.PositiveIntegerField(db_index=True, default=0)),
+                ('open_projects', models.PositiveIntegerField(default=0)),
+                ('in_progress_projects', models.PositiveIntegerField(default=0)),
+                ('total_projects', models.PositiveIntegerField(default=0)),
+                ('total_bids_received', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'owner stats',
+            },
+        ),
+        migrations.RunPython(backfill_owner_stats, migrations.RunPython.noop),
+    ]
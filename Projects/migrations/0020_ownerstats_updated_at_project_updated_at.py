@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-16 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Projects', '0019_ownerstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ownerstats',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
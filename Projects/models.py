@@ -29,6 +29,7 @@ class Project(models.Model):
 
     bid_amount = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(40)])
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default='open')
     owner = models.ForeignKey(
@@ -40,10 +41,30 @@ class Project(models.Model):
 
     experience_level= models.CharField(max_length=20, null=True, choices=EXPERIENCE_LEVEL_CHOICES)
 
+    # Denormalized number of bids, kept in sync by the Bid signals in signals.py
+    bid_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ['-created_at']
         unique_together = ('title', 'owner')
+        indexes = [
+            # Serves the default ordering and keyset pagination on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='project_created_id_idx'),
+            # The owner's and the assignee's projects by status (UserProjectsList, UsersBidsList)
+            models.Index(fields=['owner', 'status', '-created_at'], name='project_owner_status_idx'),
+            models.Index(fields=['assigned_to', 'status', '-created_at'], name='project_assignee_status_idx'),
+            # Open projects newest first (skill matches)
+            models.Index(fields=['status', '-created_at'], name='project_status_created_idx'),
+        ]
         
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so signals.py can tell when it changes
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
     def __str__(self):
         return self.title
 
@@ -57,7 +78,52 @@ class Bid(models.Model):
 
     class Meta:
         unique_together = ('project', 'user')  # Prevent duplicate bids from the same user
+        indexes = [
+            # A user's bids in keyset order; the project status filter is applied through the project's pk
+            models.Index(fields=['user', '-created_at', '-id'], name='bid_user_created_idx'),
+        ]
+
+
+    def __str__(self):
+        return self.user.username
+
+
+def normalize_skill(skill):
+    # Case and whitespace insensitive form used by the skill index
+    return ' '.join(str(skill).split()).lower()[:100]
+
+
+class ProjectSkill(models.Model):
+    # Inverted index of Project.skills_needed, kept in sync by signals.py
+    project = models.ForeignKey(Project, related_name='skill_index', on_delete=models.CASCADE)
+    skill = models.CharField(max_length=100)
 
+    class Meta:
+        unique_together = ('skill', 'project')
+
+    def __str__(self):
+        return self.skill
+
+
+class OwnerStats(models.Model):
+    # Per-user project counters, maintained incrementally by signals.py
+    user = models.OneToOneField(CustomUser, primary_key=True, related_name='owner_stats', on_delete=models.CASCADE)
+    completed_projects = models.PositiveIntegerField(default=0, db_index=True)
+    open_projects = models.PositiveIntegerField(default=0)
+    in_progress_projects = models.PositiveIntegerField(default=0)
+    total_projects = models.PositiveIntegerField(default=0)
+    total_bids_received = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Project status -> counter column
+    STATUS_FIELDS = {
+        'open': 'open_projects',
+        'in_progress': 'in_progress_projects',
+        'closed': 'completed_projects',
+    }
+
+    class Meta:
+        verbose_name_plural = 'owner stats'
 
     def __str__(self):
-        return self.user.username
\ No newline at end of file
+        return self.user.username
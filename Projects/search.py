@@ -0,0 +1,114 @@
+import re
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'projects_project_fts'
+
+# External-content FTS5 table over Projects_project, kept in sync by triggers
+SQLITE_SEARCH_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, skills_needed,
+        content='Projects_project', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON "Projects_project" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, skills_needed)
+        VALUES (new.id, new.title, new.description, new.skills_needed);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON "Projects_project" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, skills_needed)
+        VALUES ('delete', old.id, old.title, old.description, old.skills_needed);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, skills_needed ON "Projects_project" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, skills_needed)
+        VALUES ('delete', old.id, old.title, old.description, old.skills_needed);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, skills_needed)
+        VALUES (new.id, new.title, new.description, new.skills_needed);
+    END""",
+]
+
+# The same expression is used by the GIN index and by the search query, so
+# PostgreSQL can answer the match from the index. {table} is the quoted alias
+# of the project table in the query.
+POSTGRES_DOCUMENT = (
+    "to_tsvector('english', coalesce({table}.\"title\", '') || ' ' || "
+    "coalesce({table}.\"description\", '') || ' ' || "
+    "coalesce({table}.\"skills_needed\"::text, ''))"
+)
+
+POSTGRES_SEARCH_INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS projects_project_search_idx ON \"Projects_project\" "
+    "USING GIN ((to_tsvector('english', coalesce(\"title\", '') || ' ' || "
+    "coalesce(\"description\", '') || ' ' || coalesce(\"skills_needed\"::text, ''))))",
+]
+
+
+def install_search_index(conn=None, rebuild=False):
+    """
+    Create the full-text index for the current database vendor if it is missing.
+
+    Safe to call repeatedly. SQLite drops triggers whenever a migration rebuilds
+    the Projects_project table, so this also runs after every migrate.
+    """
+    conn = conn or connection
+    if conn.vendor == 'sqlite':
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+            created = cursor.fetchone() is None
+            for statement in SQLITE_SEARCH_INDEX_SQL:
+                cursor.execute(statement)
+            if created or rebuild:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif conn.vendor == 'postgresql':
+        with conn.cursor() as cursor:
+            for statement in POSTGRES_SEARCH_INDEX_SQL:
+                cursor.execute(statement)
+
+
+def search_terms(query):
+    # Keep only word characters so user input can never inject query syntax
+    return re.findall(r'\w+', query.lower())
+
+
+def search_projects(queryset, query):
+    """
+    Filter a Project queryset by a free-text query and order it by relevance.
+
+    Title, description and skills are matched by word prefix, so "pyth" finds
+    "Python". Uses FTS5 on SQLite and a tsvector GIN index on PostgreSQL,
+    falling back to icontains on any other backend.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+
+    conn = connections[queryset.db]
+    # The alias the query gives the project table, which is not always its name
+    queryset = queryset.all()
+    table = conn.ops.quote_name(queryset.query.get_initial_alias())
+    pk = f'{table}.{conn.ops.quote_name(queryset.model._meta.pk.column)}'
+
+    if conn.vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # Join the index once: SQLite runs the MATCH a single time and looks the
+        # projects up by rowid, and bm25 rank (lower is more relevant) comes with it
+        return queryset.extra(
+            select={'search_rank': f'{FTS_TABLE}.rank'},
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {pk}', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+        ).order_by('search_rank', '-created_at')
+
+    if conn.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        document = POSTGRES_DOCUMENT.format(table=table)
+        return queryset.filter(
+            RawSQL(f"{document} @@ to_tsquery('english', %s)", [tsquery], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f"ts_rank({document}, to_tsquery('english', %s))", [tsquery], output_field=FloatField())
+        ).order_by('-search_rank', '-created_at')
+
+    return queryset.filter(
+        Q(title__icontains=query) | Q(description__icontains=query) | Q(skills_needed__icontains=query)
+    )
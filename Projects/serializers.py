@@ -1,27 +1,31 @@
 from rest_framework import serializers
-from .models import Project, Bid
+from api.fieldsets import SparseFieldsetSerializerMixin
+from .models import Project, Bid, OwnerStats
 from django.core.exceptions import ValidationError, PermissionDenied
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class OwnerStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OwnerStats
+        exclude = ['user']
+
+
+class ProjectSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     owner_username = serializers.ReadOnlyField(source='owner.username')
     owner_first_name = serializers.ReadOnlyField(source='owner.first_name')
     owner_last_name = serializers.ReadOnlyField(source='owner.last_name')
     owner_title = serializers.ReadOnlyField(source='owner.user_title')
     owner_location = serializers.ReadOnlyField(source='owner.country')
-    bids = serializers.SerializerMethodField() 
+    bids = serializers.IntegerField(source='bid_count', read_only=True)
+    owner_stats = OwnerStatsSerializer(source='owner.owner_stats', read_only=True)
 
 
     class Meta:
         model = Project
-        fields = '__all__'
+        exclude = ['bid_count']  # Sent as 'bids'
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-    def get_bids(self, obj):
-        # Assuming a ForeignKey relationship: Bid.project
-        return Bid.objects.filter(project=obj).count()
-
-class BidSerializer(serializers.ModelSerializer):
+class BidSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     bidder_first_name = serializers.ReadOnlyField(source='user.first_name')
     bidder_last_name = serializers.ReadOnlyField(source='user.last_name')
     project_title = serializers.ReadOnlyField(source='project.title')
@@ -41,8 +45,8 @@ class BidSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         user = self.context['request'].user
-        project_id = self.context['project_id']
-        project = Project.objects.get(id=project_id)
+        # The view passes the project it already loaded; only fall back to a query without it
+        project = self.context.get('project') or Project.objects.get(id=self.context['project_id'])
 
         # Custom validation logic
         if user == project.owner:
@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from Users.models import CustomUser
+from .models import Bid, OwnerStats, Project, ProjectSkill, normalize_skill
+from .stats import bump_owner_stats
+from .cache import bump_catalog_version
+
+
+def bid_owner_id(bid):
+    # The project is usually cached on the bid already; avoid a query when it is
+    if Bid.project.is_cached(bid):
+        return bid.project.owner_id
+    return Project.objects.filter(pk=bid.project_id).values_list('owner_id', flat=True).first()
+
+
+@receiver(post_save, sender=Bid)
+def increment_bid_count(sender, instance, created, **kwargs):
+    if created:
+        Project.objects.filter(pk=instance.project_id).update(bid_count=F('bid_count') + 1, updated_at=timezone.now())
+        bump_owner_stats(bid_owner_id(instance), total_bids_received=1)
+
+
+@receiver(post_delete, sender=Bid)
+def decrement_bid_count(sender, instance, **kwargs):
+    # When the project itself is being deleted this matches no rows, which is fine
+    Project.objects.filter(pk=instance.project_id, bid_count__gt=0).update(bid_count=F('bid_count') - 1, updated_at=timezone.now())
+    bump_owner_stats(bid_owner_id(instance), total_bids_received=-1)
+
+
+@receiver(post_save, sender=Project)
+def sync_project_skills(sender, instance, created, **kwargs):
+    skills = {normalize_skill(skill) for skill in instance.skills_needed or [] if str(skill).strip()}
+    existing = set() if created else set(
+        ProjectSkill.objects.filter(project=instance).values_list('skill', flat=True)
+    )
+
+    if existing - skills:
+        ProjectSkill.objects.filter(project=instance, skill__in=existing - skills).delete()
+    if skills - existing:
+        ProjectSkill.objects.bulk_create(
+            [ProjectSkill(project=instance, skill=skill) for skill in skills - existing],
+            ignore_conflicts=True
+        )
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_status(sender, instance, **kwargs):
+    # Instances loaded from the database already know their stored status
+    if not instance._state.adding and not hasattr(instance, '_loaded_status'):
+        instance._loaded_status = Project.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Project)
+def update_owner_stats(sender, instance, created, **kwargs):
+    deltas = {'total_projects': 1} if created else {}
+    previous = None if created else instance._loaded_status
+
+    if previous != instance.status:
+        if previous in OwnerStats.STATUS_FIELDS:
+            deltas[OwnerStats.STATUS_FIELDS[previous]] = -1
+        if instance.status in OwnerStats.STATUS_FIELDS:
+            deltas[OwnerStats.STATUS_FIELDS[instance.status]] = 1
+
+    bump_owner_stats(instance.owner_id, **deltas)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Project)
+def decrement_owner_stats(sender, instance, **kwargs):
+    deltas = {'total_projects': -1}
+    status_field = OwnerStats.STATUS_FIELDS.get(getattr(instance, '_loaded_status', instance.status))
+    if status_field:
+        deltas[status_field] = -1
+    bump_owner_stats(instance.owner_id, **deltas)
+
+
+@receiver(post_save, sender=CustomUser)
+def create_owner_stats(sender, instance, created, **kwargs):
+    if created:
+        OwnerStats.objects.get_or_create(user=instance)
+
+
+@receiver(m2m_changed, sender=CustomUser.saved_projects.through)
+def touch_user_on_saved_projects_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # saved_projects is part of the profile payload, so changing it must change the user's validators
+    if reverse and action == 'pre_clear':
+        # project.saved_by.clear() sends no pk_set; remember who loses the project before the rows go
+        instance._cleared_saved_by = list(instance.saved_by.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse and action == 'post_clear':
+        user_ids = instance.__dict__.pop('_cleared_saved_by', [])
+    elif reverse:
+        # project.saved_by.add(...) / remove(...): pk_set holds the users
+        user_ids = list(pk_set or [])
+    else:
+        user_ids = [instance.pk]
+    CustomUser.objects.filter(pk__in=user_ids).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Bid)
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_project_lists(sender, **kwargs):
+    # Any catalog or owner profile write makes every cached project list stale. Bump
+    # again after commit so a list cached mid-transaction can't outlive the write.
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
@@ -0,0 +1,72 @@
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from Users.models import CustomUser
+from api.db import batched
+from .models import Bid, OwnerStats, Project
+
+
+COUNTER_FIELDS = ['completed_projects', 'open_projects', 'in_progress_projects', 'total_projects', 'total_bids_received']
+
+
+def bump_owner_stats(user_id, **deltas):
+    """
+    Apply counter deltas to a user's OwnerStats row in a single UPDATE,
+    e.g. ``bump_owner_stats(7, total_projects=1, open_projects=1)``.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if user_id is None or not deltas:
+        return
+    updated = OwnerStats.objects.filter(user_id=user_id).update(
+        updated_at=timezone.now(),
+        **{field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()}
+    )
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        # Missing row (e.g. created outside the signals); recompute it from scratch.
+        # Decrements are skipped: the row is usually gone because the user is being deleted.
+        rebuild_owner_stats(user_ids=[user_id])
+
+
+def rebuild_owner_stats(user_ids=None, batch_size=1000):
+    """Recompute OwnerStats from the Project and Bid tables, for every user or only ``user_ids``."""
+    users = CustomUser.objects.order_by('id').values_list('id', flat=True)
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+
+    total = 0
+    # Streamed from a server-side cursor on PostgreSQL
+    for batch in batched(users.iterator(chunk_size=batch_size), batch_size):
+        total += len(batch)
+        stats = {user_id: OwnerStats(user_id=user_id) for user_id in batch}
+
+        projects = (
+            Project.objects.filter(owner__in=batch)
+            .order_by()
+            .values('owner')
+            .annotate(
+                total=Count('id'),
+                open=Count('id', filter=Q(status='open')),
+                in_progress=Count('id', filter=Q(status='in_progress')),
+                closed=Count('id', filter=Q(status='closed')),
+            )
+        )
+        for row in projects:
+            row_stats = stats[row['owner']]
+            row_stats.total_projects = row['total']
+            row_stats.open_projects = row['open']
+            row_stats.in_progress_projects = row['in_progress']
+            row_stats.completed_projects = row['closed']
+
+        bids = (
+            Bid.objects.filter(project__owner__in=batch)
+            .order_by()
+            .values('project__owner')
+            .annotate(total=Count('id'))
+        )
+        for row in bids:
+            stats[row['project__owner']].total_bids_received = row['total']
+
+        OwnerStats.objects.bulk_create(
+            stats.values(), update_conflicts=True, unique_fields=['user'], update_fields=COUNTER_FIELDS + ['updated_at']
+        )
+    return total
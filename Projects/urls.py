@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import ProjectListCreateView, ProjectDetailView, UserProjectsList, UserProjectMatchesList, UserSavedProjectsList, ToggleSavedProject, BidListCreateView, UsersBidsList
+from .views import ProjectListCreateView, ProjectListCacheStatsView, ProjectDetailView, UserProjectsList, UserProjectMatchesList, UserSavedProjectsList, ToggleSavedProject, BidListCreateView, UsersBidsList
 
 urlpatterns = [
     path('', ProjectListCreateView.as_view(), name='project-list-create'),
+    path('cache/stats/', ProjectListCacheStatsView.as_view(), name='project-list-cache-stats'),
     path('<int:pk>/', ProjectDetailView.as_view(), name='project-detail'),
     path('user/', UserProjectsList.as_view(), name='user-projects'),
     path('user/<int:user_id>/matches/', UserProjectMatchesList.as_view(), name='user-project-matches'),
@@ -3,13 +3,25 @@ from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
-from .models import Project, Bid
-from Users.models import CustomUser, Notification, Transaction
+from api.pagination import KeysetPagination
+from api.conditional import ConditionalRequestMixin
+from api.fieldsets import SparseFieldsetViewMixin
+from api.renderers import StreamingJSONMixin
+from api.routers import read_from_primary
+from api.compiled import CompiledListMixin
+from api import metrics
+from .models import Project, Bid, normalize_skill
+from Users.models import CustomUser, Transaction
+from Users.outbox import queue_notification
 from .serializers import ProjectSerializer, BidSerializer
-from rest_framework.permissions import  IsAuthenticatedOrReadOnly, IsAuthenticated
+from .search import search_projects
+from .filters import ProjectFilterSet
+from .cache import list_cache_key, get_cached_list, set_cached_list, list_cache_stats
+from rest_framework.permissions import  IsAuthenticatedOrReadOnly, IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count
-from django.db import IntegrityError
+from django.db.models import Count, F
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
 
 class ProjectPagination(PageNumberPagination):
@@ -18,133 +30,54 @@ class ProjectPagination(PageNumberPagination):
     max_page_size = 100  # Max page size allowed
 
 
+class ProjectListPagination(KeysetPagination):
+    # Page numbers by default, keyset pages when the client sends ?cursor=
+    fallback_class = ProjectPagination
 
-class ProjectListCreateView(generics.ListCreateAPIView):
-    queryset = Project.objects.all()
-    serializer_class = ProjectSerializer
-    pagination_class = ProjectPagination
 
+class ProjectMatchesPagination(ProjectListPagination):
+    # Keyset pages follow the ranking: most shared skills first, then newest
+    rank_field = 'matched_skills'
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        
-        # Access the query parameters
-        query = self.request.query_params.get('search')
-        project_type = self.request.query_params.get('project_type')
-        experience_level = self.request.query_params.get('experience_level')  # e.g., "beginner,intermediate"
-        budget = self.request.query_params.get('budget')  # e.g., "23-42"
-        country = self.request.query_params.get('country')
-        proposals = self.request.query_params.get('proposals')
-        project_length = self.request.query_params.get('project_length')
-        client_history = self.request.query_params.get('client_history')
-
-
-        # Apply the search query first if it exists
-        if not query:
-            queryset = queryset
-        else:
-            queryset = queryset.filter(
-                Q(title__icontains=query) | Q(skills_needed__icontains=query)
-            )
 
-        # Handle the project type filter (Normal, Skill Exchange)
-        if project_type:
-            project_type_list = project_type.split(',')
-            queryset = queryset.filter(type__in=project_type_list)
-
-
-        # Handle the budget query
-        if budget:
-            try:
-                min_budget, max_budget = map(int, budget.split('-'))
-                if min_budget is not None:
-                    queryset = queryset.filter(budget__gte=min_budget)
-                if max_budget is not None:
-                    queryset = queryset.filter(budget__lte=max_budget)
-            except ValueError:
-                return queryset.none()  # Return an empty queryset on invalid format
-
-
-        # Filter by experience level
-        if experience_level:
-            experience_level_list = experience_level.split(',')
-            queryset = queryset.filter(experience_level__in=experience_level_list)
-
-        # Filter by country
-        if country:
-            queryset = queryset.filter(owner__country=country)
-
-        # Filter by proposals
-        if proposals:
-            proposal_ranges = proposals.split(',')
-            filters = Q()  
-
-            # Annotate each project with the number of bids
-            queryset = queryset.annotate(bid_count=Count('bids'))
-
-            for proposal_range in proposal_ranges:
-                try:
-                    # Only process valid proposal ranges, skipping invalid ones
-                    if '-' in proposal_range and proposal_range.replace('-', '').isdigit():
-                        min_proposal, max_proposal = map(int, proposal_range.split('-'))
-                        filters |= Q(bids__gte=min_proposal, bids__lte=max_proposal)
-                except ValueError:
-                    continue  # Skip any invalid ranges
-
-            queryset = queryset.filter(filters)
-
-        # Filter by project length (in months, converting to days)
-        if project_length:
-            project_length_ranges = project_length.split(',')
-            filters = Q()  # Empty Q object to chain multiple ranges
-        
-            for project_length_range in project_length_ranges:
-                try:
-                    min_project_length, max_project_length = map(int, project_length_range.split('-'))
-        
-                    # Convert months to days (assuming 30.44 days per month)
-                    min_days = round(min_project_length * 30.44)
-                    max_days = round(max_project_length * 30.44)
-
-                    # Add each range as a filter
-                    filters |= Q(duration__gte=min_days, duration__lte=max_days)
-                
-                except ValueError:
-                    continue  # Skip invalid ranges in case of errors
-            
-            queryset = queryset.filter(filters)
+class ProjectListCreateView(SparseFieldsetViewMixin, CompiledListMixin, StreamingJSONMixin, generics.ListCreateAPIView):
+    # ?search= results are ordered by relevance, which keyset pages cannot follow:
+    # a search with ?cursor= gets a 400, page numbers work as usual
+    queryset = Project.objects.select_related('owner', 'owner__owner_stats')
+    serializer_class = ProjectSerializer
+    pagination_class = ProjectListPagination
+    use_replica = True  # GETs read from a replica (see api/routers.py)
 
-        
-        # Filter by client history (count completed projects per client)
-        if client_history:
-            client_history_ranges = client_history.split(',')
-            filters = Q()
 
-            # Annotate the queryset with the count of completed projects for each client
-            queryset = queryset.annotate(
-                completed_projects=Count('owner__projects', filter=Q(owner__projects__status='completed'))
-            )
+    def get_queryset(self):
+        queryset = super().get_queryset()
 
-            # Apply the filters based on the client history ranges
-            for history_range in client_history_ranges:
-                if history_range == "10+":  # Special case for "10+"
-                    filters |= Q(completed_projects__gte=10)
-                elif '-' in history_range:  # Handle ranges like "1-9"
-                    try:
-                        min_projects, max_projects = map(int, history_range.split('-'))
-                        filters |= Q(completed_projects__gte=min_projects, completed_projects__lte=max_projects)
-                    except ValueError:
-                        continue  # Skip invalid ranges
-                else:  # Handle single values like "0"
-                    try:
-                        min_projects = int(history_range)
-                        filters |= Q(completed_projects__exact=min_projects)
-                    except ValueError:
-                        continue  # Skip invalid values
-
-            queryset = queryset.filter(filters)
-
-        return queryset.distinct()
+        # Apply the full-text search first if it exists (results are ranked by relevance)
+        query = self.request.query_params.get('search')
+        if query:
+            queryset = search_projects(queryset, query)
+
+        # Project type, budget, experience level, country, proposals, length and client history
+        return ProjectFilterSet(self.request.query_params).filter_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        # Serve common queries from the versioned response cache (see cache.py)
+        key = list_cache_key(request)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        data = get_cached_list(key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        # The cached page is shared by every client, so fill it from the primary
+        # rather than from a replica that may lag behind the catalog version
+        with read_from_primary():
+            response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_cached_list(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
 
     def post(self, request):
         user = request.user
@@ -185,13 +118,12 @@ class ProjectListCreateView(generics.ListCreateAPIView):
             project.save()
             
             # Send notification to the project owner
-            notification = Notification.objects.create(
+            queue_notification(
                 user=user,
                 type='project',
                 url= f'/dashboard/projects/{project.id}?title={project.title}&description={project.description}',
                 message='Congratulations! Your project has been successfully created on our platform. Now, talented freelancers can discover it and submit their proposals. Keep an eye on your inbox for updates!'
             )
-            notification.save()
 
 
 
@@ -200,14 +132,44 @@ class ProjectListCreateView(generics.ListCreateAPIView):
             return Response({'error': 'Project already exists.'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Project.objects.all()
+class ProjectListCacheStatsView(generics.GenericAPIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(list_cache_stats())
+
+
+class ProjectDetailView(ConditionalRequestMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Project.objects.select_related('owner', 'owner__owner_stats')
     serializer_class = ProjectSerializer
+    use_replica = True  # GETs read from a replica (see api/routers.py)
 
+    def get_validators(self):
+        # The response also embeds owner fields and owner stats, so their timestamps count too
+        row = Project.objects.filter(pk=self.kwargs['pk']).values_list(
+            'updated_at', 'owner__updated_at', 'owner__owner_stats__updated_at'
+        ).first()
+        return row and self.make_validators(*row)
 
-class UserProjectsList(generics.ListAPIView):
+    def object_validators(self, project):
+        # Same timestamps, read off the rows retrieve() already joined; sparse fieldsets may defer them
+        rows = [project, project.owner, getattr(project.owner, 'owner_stats', None)]
+        if any('updated_at' in row.get_deferred_fields() for row in rows if row is not None):
+            return None
+        return self.make_validators(*(row and row.updated_at for row in rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().update, *args, **kwargs)
+
+
+class UserProjectsList(StreamingJSONMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = ProjectSerializer
+    trust_token_claims = True  # Only uses request.user.id
+    use_replica = True  # GETs read from a replica (see api/routers.py)
 
     def get_queryset(self):
         user_id = self.request.user.id
@@ -224,213 +186,41 @@ class UserProjectsList(generics.ListAPIView):
             return Project.objects.filter(owner=user, status='closed')
         return Project.objects.filter(owner=user)
 
-class UserProjectMatchesList(generics.ListAPIView):
+class UserProjectMatchesList(StreamingJSONMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = ProjectSerializer
-    pagination_class = ProjectPagination
+    pagination_class = ProjectMatchesPagination
+    use_replica = True  # GETs read from a replica (see api/routers.py)
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         user = get_object_or_404(CustomUser, id=user_id)
-        
-        # Start with open projects
-        queryset = Project.objects.filter(status='open')
-
-        # Filter projects that match user's skills or interests
-        project_ids = []
-        for project in queryset:
-            if any(skill in user.skills for skill in project.skills_needed) or any(interest in user.interests for interest in project.skills_needed):
-                project_ids.append(project.id)
-
-        queryset = queryset.filter(id__in=project_ids)
-
-        # Access the query parameters for additional filters
-        project_type = self.request.query_params.get('project_type')
-        experience_level = self.request.query_params.get('experience_level')
-        budget = self.request.query_params.get('budget')
-        country = self.request.query_params.get('country')
-        proposals = self.request.query_params.get('proposals')
-        project_length = self.request.query_params.get('project_length')
-        client_history = self.request.query_params.get('client_history')
-
-        # Handle the project type filter (Normal, Skill Exchange)
-        if project_type:
-            project_type_list = project_type.split(',')
-            queryset = queryset.filter(type__in=project_type_list)
-
-        # Handle the budget query
-        if budget:
-            try:
-                min_budget, max_budget = map(int, budget.split('-'))
-                if min_budget is not None:
-                    queryset = queryset.filter(budget__gte=min_budget)
-                if max_budget is not None:
-                    queryset = queryset.filter(budget__lte=max_budget)
-            except ValueError:
-                return queryset.none()  # Return an empty queryset on invalid format
-
-        # Filter by experience level
-        if experience_level:
-            experience_level_list = experience_level.split(',')
-            queryset = queryset.filter(experience_level__in=experience_level_list)
-
-        # Filter by country
-        if country:
-            queryset = queryset.filter(owner__country=country)
-
-        # Filter by proposals
-        if proposals:
-            proposal_ranges = proposals.split(',')
-            filters = Q()  
-            # Annotate each project with the number of bids
-            queryset = queryset.annotate(bid_count=Count('bids'))
-
-            for proposal_range in proposal_ranges:
-                min_proposal, max_proposal = map(int, proposal_range.split('-'))
-                filters |= Q(bids__gte=min_proposal, bids__lte=max_proposal)
-
-            queryset = queryset.filter(filters)
-
-        # Filter by project length (in months, converting to days)
-        if project_length:
-            project_length_ranges = project_length.split(',')
-            filters = Q()  # Empty Q object to chain multiple ranges
-        
-            for project_length_range in project_length_ranges:
-                try:
-                    min_project_length, max_project_length = map(int, project_length_range.split('-'))
-                    # Convert months to days (assuming 30.44 days per month)
-                    min_days = round(min_project_length * 30.44)
-                    max_days = round(max_project_length * 30.44)
-
-                    # Add each range as a filter
-                    filters |= Q(duration__gte=min_days, duration__lte=max_days)
-                
-                except ValueError:
-                    continue  # Skip invalid ranges in case of errors
-            
-            queryset = queryset.filter(filters)
 
-        # Filter by client history (count completed projects per client)
-        if client_history:
-            client_history_ranges = client_history.split(',')
-            filters = Q()
+        # Open projects sharing at least one skill with the user's skills or interests,
+        # resolved through the ProjectSkill index and ranked by the number of shared skills
+        user_skills = {normalize_skill(skill) for skill in (user.skills or []) + (user.interests or [])}
+        queryset = Project.objects.select_related('owner', 'owner__owner_stats').filter(
+            status='open', skill_index__skill__in=user_skills
+        ).annotate(
+            matched_skills=Count('skill_index')
+        ).order_by('-matched_skills', '-created_at')
 
-            # Annotate the queryset with the count of completed projects for each client
-            queryset = queryset.annotate(
-                completed_projects=Count('owner__projects', filter=Q(owner__projects__status='completed'))
-            )
-
-            # Apply the filters based on the client history ranges
-            for history_range in client_history_ranges:
-                if history_range == "10+":  # Special case for "10+"
-                    filters |= Q(completed_projects__gte=10)
-                else:
-                    min_projects, max_projects = map(int, history_range.split('-'))
-                    filters |= Q(completed_projects__gte=min_projects, completed_projects__lte=max_projects)
-
-            queryset = queryset.filter(filters)
+        return ProjectFilterSet(self.request.query_params).filter_queryset(queryset)
 
-        return queryset.distinct()
-
-class UserSavedProjectsList(generics.ListAPIView):
+class UserSavedProjectsList(StreamingJSONMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = ProjectSerializer
-    pagination_class = ProjectPagination
+    pagination_class = ProjectListPagination
+    use_replica = True  # GETs read from a replica (see api/routers.py)
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         user = get_object_or_404(CustomUser, id=user_id)
-        
-        # Start with the user's saved projects
-        queryset = user.saved_projects.all()
-
-        # Access the query parameters for filtering
-        project_type = self.request.query_params.get('project_type')
-        experience_level = self.request.query_params.get('experience_level')
-        budget = self.request.query_params.get('budget')
-        country = self.request.query_params.get('country')
-        proposals = self.request.query_params.get('proposals')
-        project_length = self.request.query_params.get('project_length')
-        client_history = self.request.query_params.get('client_history')
-
-        # Handle project type filter
-        if project_type:
-            project_type_list = project_type.split(',')
-            queryset = queryset.filter(type__in=project_type_list)
-
-        # Handle the budget filter
-        if budget:
-            try:
-                min_budget, max_budget = map(int, budget.split('-'))
-                if min_budget is not None:
-                    queryset = queryset.filter(budget__gte=min_budget)
-                if max_budget is not None:
-                    queryset = queryset.filter(budget__lte=max_budget)
-            except ValueError:
-                return queryset.none()  # Return empty queryset on invalid format
-
-        # Filter by experience level
-        if experience_level:
-            experience_level_list = experience_level.split(',')
-            queryset = queryset.filter(experience_level__in=experience_level_list)
-
-        # Filter by country
-        if country:
-            queryset = queryset.filter(owner__country=country)
-
-        # Filter by proposals
-        if proposals:
-            proposal_ranges = proposals.split(',')
-            filters = Q()  
-
-            # Annotate each project with the number of bids
-            queryset = queryset.annotate(bid_count=Count('bids'))
-
-            for proposal_range in proposal_ranges:
-                min_proposal, max_proposal = map(int, proposal_range.split('-'))
-                filters |= Q(bids__gte=min_proposal, bids__lte=max_proposal)
-
-            queryset = queryset.filter(filters)
-
-        # Filter by project length (in months, converting to days)
-        if project_length:
-            project_length_ranges = project_length.split(',')
-            filters = Q()  # Empty Q object to chain multiple ranges
-
-            for project_length_range in project_length_ranges:
-                try:
-                    min_project_length, max_project_length = map(int, project_length_range.split('-'))
-                    min_days = round(min_project_length * 30.44)  # Convert months to days
-                    max_days = round(max_project_length * 30.44)
-
-                    filters |= Q(duration__gte=min_days, duration__lte=max_days)
-
-                except ValueError:
-                    continue  # Skip invalid ranges
-
-            queryset = queryset.filter(filters)
-
-        # Filter by client history
-        if client_history:
-            client_history_ranges = client_history.split(',')
-            filters = Q()
-
-            # Annotate the queryset with the count of completed projects for each client
-            queryset = queryset.annotate(
-                completed_projects=Count('owner__projects', filter=Q(owner__projects__status='completed'))
-            )
-
-            for history_range in client_history_ranges:
-                if history_range == "10+":  # Special case for "10+"
-                    filters |= Q(completed_projects__gte=10)
-                else:
-                    min_projects, max_projects = map(int, history_range.split('-'))
-                    filters |= Q(completed_projects__gte=min_projects, completed_projects__lte=max_projects)
 
-            queryset = queryset.filter(filters)
+        # Start with the user's saved projects
+        queryset = user.saved_projects.select_related('owner', 'owner__owner_stats')
 
-        return queryset.distinct()
+        return ProjectFilterSet(self.request.query_params).filter_queryset(queryset)
 
 class ToggleSavedProject(generics.GenericAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -455,10 +245,11 @@ class ToggleSavedProject(generics.GenericAPIView):
         return Response({'message': message}, status=status.HTTP_200_OK)
 
 
-class BidListCreateView(generics.ListCreateAPIView):
+class BidListCreateView(SparseFieldsetViewMixin, CompiledListMixin, StreamingJSONMixin, generics.ListCreateAPIView):
     queryset = Bid.objects.all()
     serializer_class = BidSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    use_replica = True  # GETs read from a replica (see api/routers.py)
 
     def get_queryset(self):
         project_id = self.kwargs['project_id']
@@ -467,57 +258,58 @@ class BidListCreateView(generics.ListCreateAPIView):
 
     def post(self, request, **kwargs):
         project_id = self.kwargs['project_id']
-        project = get_object_or_404(Project, id=project_id)
+        project = get_object_or_404(Project.objects.select_related('owner'), id=project_id)
         user = self.request.user
-        proposal = self.request.data.get('proposal')
-        amount = self.request.data.get('amount')
-        duration = self.request.data.get('duration')
-        
 
         # Include the project in the request data for validation purposes
         data = request.data.copy()  
         data['project'] = project_id  
 
-        try:
-            # Validate the request data
-            serializer = BidSerializer(data=data, context={'request': request, 'project_id': project_id })
-
-            # Validate the data
-            serializer.is_valid(raise_exception=True)
-            # If validation passes, create the bid
-            serializer.save(user=user, project=project, proposal=proposal, amount=amount, duration=duration)
-
-
-            # Reduce sparks
-            user.sparks -= project.bid_amount
-            user.save()
-
-            # Create the transaction
-            Transaction.objects.create(
-                user=user,
-                currency='spark',
-                type='payment',
-                description='Bid on project',
-                amount=project.bid_amount,
-            )
-
-            # Send Notification to the project owner
-            Notification.objects.create(
-                user=project.owner,
-                type="bid",
-                url=f"/dashboard/projects/{project.id}?title={project.title}&description={project.description}",
-                message=f"{user.first_name} {user.last_name} has submitted a bid on your project."
-            )
+        # Validate the request data against the project loaded above
+        serializer = BidSerializer(data=data, context={'request': request, 'project_id': project_id, 'project': project})
+        serializer.is_valid(raise_exception=True)
 
-            return Response({'message': 'Bid created successfully'}, status=status.HTTP_201_CREATED)
+        try:
+            with transaction.atomic():
+                # Reduce sparks with a conditional UPDATE so concurrent bids can never overdraw
+                charged = CustomUser.objects.filter(pk=user.pk, sparks__gte=project.bid_amount).update(
+                    sparks=F('sparks') - project.bid_amount, updated_at=timezone.now()
+                )
+                if not charged:
+                    raise ValidationError({'error': ['You do not have enough sparks to bid on this project.']})
+
+                # If validation passes, create the bid
+                serializer.save(user=user, project=project)
+
+                # Create the transaction
+                Transaction.objects.create(
+                    user=user,
+                    currency='spark',
+                    type='payment',
+                    description='Bid on project',
+                    amount=project.bid_amount,
+                )
+
+                # Send Notification to the project owner
+                queue_notification(
+                    user=project.owner,
+                    type="bid",
+                    url=f"/dashboard/projects/{project.id}?title={project.title}&description={project.description}",
+                    message=f"{user.first_name} {user.last_name} has submitted a bid on your project."
+                )
+                transaction.on_commit(lambda: metrics.inc('bids_placed_total'))
         except IntegrityError:
-            # Handle the case where a duplicate bid is attempted
+            # Handle the case where a duplicate bid is attempted (the sparks deduction is rolled back)
             raise ValidationError({'error': 'You cannot apply again for this project.'})
 
+        return Response({'message': 'Bid created successfully'}, status=status.HTTP_201_CREATED)
+
 
-class UsersBidsList(generics.ListAPIView):
+class UsersBidsList(StreamingJSONMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = BidSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    use_replica = True  # GETs read from a replica (see api/routers.py)
 
     def get_queryset(self):
         user = self.request.user
@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import CustomUser, Transaction, Notification
+from .models import CustomUser, Transaction, Notification, Conversation, BalanceCheckpoint
 
 admin.site.register(CustomUser)
 admin.site.register(Transaction)
-admin.site.register(Notification)
\ No newline at end of file
+admin.site.register(Notification)
+admin.site.register(Conversation)
+admin.site.register(BalanceCheckpoint)
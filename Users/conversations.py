@@ -0,0 +1,76 @@
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, F, Q, Value, When
+from .models import Conversation, Message
+
+
+def record_message(message):
+    """Fold a new message into its Conversation row with one UPDATE (or an INSERT for a new pair)."""
+    user_a, user_b = Conversation.pair(message.sender_id, message.receiver_id)
+    unread_field = 'unread_a' if message.receiver_id == user_a else 'unread_b'
+    preview = message.message[:Conversation.PREVIEW_LENGTH]
+
+    # Messages committed out of order must not replace a newer preview
+    newer = Q(last_message_at__lte=message.created_at)
+    updated = Conversation.objects.filter(user_a_id=user_a, user_b_id=user_b).update(
+        last_message_at=Case(When(newer, then=Value(message.created_at)), default=F('last_message_at')),
+        last_message=Case(When(newer, then=Value(preview)), default=F('last_message')),
+        last_sender_id=Case(
+            When(newer, then=Value(message.sender_id)), default=F('last_sender_id'), output_field=BigIntegerField()
+        ),
+        **{unread_field: F(unread_field) + 1}
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            Conversation.objects.create(
+                user_a_id=user_a,
+                user_b_id=user_b,
+                last_message_at=message.created_at,
+                last_message=preview,
+                last_sender_id=message.sender_id,
+                **{unread_field: 1}
+            )
+    except IntegrityError:
+        # Another request created the pair first; apply this message as an update
+        record_message(message)
+
+
+def mark_conversation_read(user_id, other_user_id):
+    """Reset ``user_id``'s unread count for the thread with ``other_user_id``."""
+    user_a, user_b = Conversation.pair(user_id, other_user_id)
+    unread_field = 'unread_a' if user_id == user_a else 'unread_b'
+    Conversation.objects.filter(user_a_id=user_a, user_b_id=user_b, **{f'{unread_field}__gt': 0}).update(
+        **{unread_field: 0}
+    )
+
+
+def rebuild_conversations(batch_size=1000):
+    """
+    Recompute every Conversation's last message from the Message table.
+    Unread counts are kept: messages carry no read state to rebuild them from.
+    """
+    latest = {}
+    messages = Message.objects.order_by('created_at', 'id').values_list('sender_id', 'receiver_id', 'message', 'created_at')
+    for sender_id, receiver_id, text, created_at in messages.iterator(chunk_size=batch_size):
+        latest[Conversation.pair(sender_id, receiver_id)] = (sender_id, text, created_at)
+
+    conversations = [
+        Conversation(
+            user_a_id=user_a,
+            user_b_id=user_b,
+            last_message_at=created_at,
+            last_message=text[:Conversation.PREVIEW_LENGTH],
+            last_sender_id=sender_id,
+        )
+        for (user_a, user_b), (sender_id, text, created_at) in latest.items()
+    ]
+    Conversation.objects.bulk_create(
+        conversations,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user_a', 'user_b'],
+        update_fields=['last_message_at', 'last_message', 'last_sender'],
+    )
+    return len(conversations)
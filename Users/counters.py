@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.db import transaction
+from api.metrics import count_cache_lookup
+from .models import Notification
+
+
+# Bounds how long a counter can drift if an update races a recount
+UNREAD_TIMEOUT = 300
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    """The user's unread notification count, recounted from the database on a cache miss."""
+    count = cache.get(unread_key(user_id))
+    count_cache_lookup('unread_count', hit=count is not None)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.add(unread_key(user_id), count, UNREAD_TIMEOUT)
+    return count
+
+
+def adjust_unread(user_id, delta):
+    """Apply ``delta`` to a cached counter once the current transaction commits."""
+    if not delta:
+        return
+
+    def apply():
+        key = unread_key(user_id)
+        try:
+            if cache.incr(key, delta) < 0:
+                cache.delete(key)
+        except ValueError:
+            # Not cached; the next read recounts
+            pass
+
+    transaction.on_commit(apply)
+
+
+def invalidate_unread(*user_ids):
+    """Drop cached counters whose delta is unknown (e.g. after ``bulk_create(ignore_conflicts=True)``)."""
+    keys = [unread_key(user_id) for user_id in user_ids]
+
+    def apply():
+        cache.delete_many(keys)
+
+    apply()
+    transaction.on_commit(apply)
@@ -0,0 +1,217 @@
+"""
+Server-Sent Events stream of new notifications and messages.
+
+``GET /api/events/?token=<access token>`` (EventSource cannot send headers) keeps a
+``text/event-stream`` response open and pushes ``notification`` and ``message``
+events as they are created. It must be served by ``api.asgi.application``: an idle
+connection is just a suspended coroutine, with no worker thread or DB connection.
+
+Two modes (``settings.EVENT_STREAM['MODE']``):
+
+* ``pubsub`` - events are published in-process from post_save hooks and outbox
+  flushes, so they only reach clients connected to the same process.
+* ``poll``   - for multi-worker deployments, each stream checks the database
+  every POLL_INTERVAL seconds for rows newer than its cursor. The connection is
+  released after every check. Clients resume with ``Last-Event-ID``.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .models import CustomUser, Message, Notification
+from .serializers import MessageSerializer, NotificationSerializer
+
+
+def event_stream_settings():
+    options = {'MODE': 'pubsub', 'POLL_INTERVAL': 2.0, 'HEARTBEAT': 15.0, 'QUEUE_SIZE': 100}
+    options.update(getattr(settings, 'EVENT_STREAM', {}))
+    return options
+
+
+class EventBroker:
+    """In-process pub/sub: sync publishers hand events to the event loops of subscribed streams."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def has_subscribers(self, user_id):
+        return bool(self.subscribers.get(user_id))
+
+    def subscribe(self, user_id, maxsize):
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize))
+        with self.lock:
+            self.subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self.lock:
+            self.subscribers[user_id].discard(subscription)
+            if not self.subscribers[user_id]:
+                del self.subscribers[user_id]
+
+    def publish(self, user_id, event, data):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(user_id, ()))
+        for loop, queue in subscriptions:
+            try:
+                loop.call_soon_threadsafe(self.deliver, queue, (event, data))
+            except RuntimeError:
+                # The stream's event loop has already shut down
+                pass
+
+    @staticmethod
+    def deliver(queue, item):
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # A client this far behind is better off refetching the lists
+            pass
+
+
+broker = EventBroker()
+
+
+def publish_notifications(notifications):
+    """Push freshly written notifications to their users' streams after commit."""
+    notifications = [notification for notification in notifications if broker.has_subscribers(notification.user_id)]
+    if not notifications:
+        return
+
+    def publish():
+        for notification in notifications:
+            broker.publish(notification.user_id, 'notification', NotificationSerializer(notification).data)
+
+    transaction.on_commit(publish)
+
+
+def publish_message(message):
+    if not broker.has_subscribers(message.receiver_id):
+        return
+    transaction.on_commit(lambda: broker.publish(message.receiver_id, 'message', MessageSerializer(message).data))
+
+
+def format_event(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def closing_connection(func):
+    """Run ``func`` in a worker thread and give its DB connection back straight away."""
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            connection.close()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def active_user_exists(user_id):
+    return CustomUser.objects.filter(pk=user_id, is_active=True).exists()
+
+
+def authenticate_token(request):
+    """The user id from a ``?token=`` or ``Authorization: Bearer`` access token, or None."""
+    raw = request.GET.get('token')
+    header = request.headers.get('Authorization', '')
+    if not raw and header.startswith('Bearer '):
+        raw = header[len('Bearer '):]
+    if not raw:
+        return None
+    try:
+        return AccessToken(raw)[api_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+
+
+def parse_cursor(raw):
+    """A poll cursor is ``<last notification id>:<last message id>``."""
+    try:
+        notification_id, message_id = map(int, raw.split(':'))
+    except (AttributeError, ValueError):
+        return None
+    return notification_id, message_id
+
+
+def latest_cursor(user_id):
+    notification_id = Notification.objects.filter(user_id=user_id).order_by('-id').values_list('id', flat=True).first()
+    message_id = Message.objects.filter(receiver_id=user_id).order_by('-id').values_list('id', flat=True).first()
+    return notification_id or 0, message_id or 0
+
+
+def fetch_since(user_id, cursor, limit=100):
+    """Events for rows created after ``cursor``, oldest first, and the advanced cursor."""
+    notification_id, message_id = cursor
+    events = []
+    notifications = Notification.objects.filter(user_id=user_id, id__gt=notification_id).order_by('id')[:limit]
+    for notification in notifications:
+        notification_id = notification.id
+        events.append(('notification', NotificationSerializer(notification).data, f'{notification_id}:{message_id}'))
+    messages = Message.objects.filter(receiver_id=user_id, id__gt=message_id).order_by('id')[:limit]
+    for message in messages:
+        message_id = message.id
+        events.append(('message', MessageSerializer(message).data, f'{notification_id}:{message_id}'))
+    return events, (notification_id, message_id)
+
+
+async def pubsub_events(user_id, options):
+    loop, queue = subscription = broker.subscribe(user_id, options['QUEUE_SIZE'])
+    try:
+        yield ': connected\n\n'
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), options['HEARTBEAT'])
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            yield format_event(event, data)
+    finally:
+        broker.unsubscribe(user_id, subscription)
+
+
+async def polled_events(user_id, options, cursor=None):
+    if cursor is None:
+        cursor = await closing_connection(latest_cursor)(user_id)
+    yield ': connected\n\n'
+    idle = 0.0
+    while True:
+        events, cursor = await closing_connection(fetch_since)(user_id, cursor)
+        for event, data, event_id in events:
+            yield format_event(event, data, event_id)
+        if events:
+            idle = 0.0
+            continue
+        idle += options['POLL_INTERVAL']
+        if idle >= options['HEARTBEAT']:
+            idle = 0.0
+            yield ': heartbeat\n\n'
+        await asyncio.sleep(options['POLL_INTERVAL'])
+
+
+async def event_stream(request):
+    user_id = authenticate_token(request)
+    if user_id is None or not await closing_connection(active_user_exists)(user_id):
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid.'}, status=401)
+
+    options = event_stream_settings()
+    if options['MODE'] == 'poll':
+        cursor = parse_cursor(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+        events = polled_events(user_id, options, cursor)
+    else:
+        events = pubsub_events(user_id, options)
+
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Keep nginx from buffering the stream
+    return response
@@ -0,0 +1,158 @@
+"""
+Spark / ember ledger.
+
+Transaction rows are the source of truth: a balance is the user's latest
+BalanceCheckpoint plus the signed sum of the Transactions after it, so reading
+it never scans more than one checkpoint interval. ``reconcile_ledger`` walks the
+users in chunks, repairs the cached ``CustomUser.sparks`` / ``credits`` columns
+when they drift and writes new checkpoints.
+"""
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import BalanceCheckpoint, CustomUser, Transaction, TransactionRollup
+
+
+# Only transactions older than this are folded into a checkpoint, so a row whose
+# id was allocated before a slow commit can never end up behind one
+CHECKPOINT_LAG = timedelta(minutes=5)
+
+SIGNED_AMOUNT = Case(When(type='payment', then=-F('amount')), default=F('amount'), output_field=IntegerField())
+
+
+def latest_checkpoint(field, currency, user_ref='user'):
+    checkpoints = BalanceCheckpoint.objects.filter(user=OuterRef(user_ref), currency=currency).order_by('-transaction_id')
+    return Subquery(checkpoints.values(field)[:1])
+
+
+def ledger_balances(user_ids, currency, settled_before_id=None):
+    """
+    ``{user_id: (balance, settled_balance, settled_transaction_id)}`` for ``user_ids``.
+
+    The settled figures only include transactions up to ``settled_before_id`` and
+    are what a new checkpoint may safely record.
+    """
+    users = (
+        CustomUser.objects.filter(id__in=user_ids)
+        .annotate(
+            checkpoint_balance=Coalesce(latest_checkpoint('balance', currency, 'pk'), 0),
+            checkpoint_transaction=Coalesce(latest_checkpoint('transaction_id', currency, 'pk'), 0),
+        )
+        .values_list('id', 'checkpoint_balance', 'checkpoint_transaction')
+    )
+    balances = {user_id: (balance, balance, last_id) for user_id, balance, last_id in users}
+
+    settled = Q(id__lte=settled_before_id or 0)
+    tails = (
+        Transaction.objects.filter(
+            user__in=user_ids,
+            currency=currency,
+            id__gt=Coalesce(latest_checkpoint('transaction_id', currency), 0),
+        )
+        .order_by()
+        .values('user')
+        .annotate(
+            total=Sum(SIGNED_AMOUNT),
+            settled_total=Sum(SIGNED_AMOUNT, filter=settled),
+            settled_id=Max('id', filter=settled),
+        )
+    )
+    for row in tails:
+        balance, settled_balance, last_id = balances[row['user']]
+        balances[row['user']] = (
+            balance + row['total'],
+            settled_balance + (row['settled_total'] or 0),
+            row['settled_id'] or last_id,
+        )
+    return balances
+
+
+def ledger_balance(user_id, currency):
+    balance, _, _ = ledger_balances([user_id], currency).get(user_id, (0, 0, 0))
+    return balance
+
+
+def open_balances(user):
+    """Record a new user's starting balances, which were not paid in through a Transaction."""
+    BalanceCheckpoint.objects.bulk_create([
+        BalanceCheckpoint(user=user, currency=currency, balance=getattr(user, column) or 0)
+        for currency, column in Transaction.BALANCE_COLUMNS.items()
+    ])
+
+
+def reconcile_ledger(batch_size=1000, fix=True, checkpoint=True):
+    """
+    Compare every user's cached balance columns with the ledger, a chunk of users at a time.
+    Returns ``{'users': n, 'drifted': [(user_id, currency, cached, ledger), ...], 'checkpoints': n}``.
+    """
+    cutoff = Transaction.objects.filter(created_at__lte=timezone.now() - CHECKPOINT_LAG).aggregate(last=Max('id'))['last']
+    result = {'users': 0, 'drifted': [], 'checkpoints': 0}
+
+    last_user = 0
+    while True:
+        batch = list(CustomUser.objects.filter(id__gt=last_user).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not batch:
+            break
+        last_user = batch[-1]
+        result['users'] += len(batch)
+
+        for currency, column in Transaction.BALANCE_COLUMNS.items():
+            # Read the cache before the ledger: a bid committing in between then shows up
+            # as drift that the conditional UPDATE below refuses to "fix"
+            cached = dict(CustomUser.objects.filter(id__in=batch).values_list('id', column))
+            balances = ledger_balances(batch, currency, settled_before_id=cutoff)
+
+            checkpoints = []
+            for user_id, (balance, settled_balance, settled_id) in balances.items():
+                if cached[user_id] != balance:
+                    result['drifted'].append((user_id, currency, cached[user_id], balance))
+                    if fix:
+                        CustomUser.objects.filter(pk=user_id, **{column: cached[user_id]}).update(
+                            **{column: balance, 'updated_at': timezone.now()}
+                        )
+                if checkpoint and cutoff is not None:
+                    checkpoints.append((user_id, settled_balance, settled_id))
+
+            if checkpoints:
+                current = dict(
+                    CustomUser.objects.filter(id__in=batch)
+                    .annotate(last=Coalesce(latest_checkpoint('transaction_id', currency, 'pk'), -1))
+                    .values_list('id', 'last')
+                )
+                new = [
+                    BalanceCheckpoint(user_id=user_id, currency=currency, balance=balance, transaction_id=last_id)
+                    for user_id, balance, last_id in checkpoints
+                    if last_id > current[user_id]
+                ]
+                BalanceCheckpoint.objects.bulk_create(new, batch_size=batch_size)
+                result['checkpoints'] += len(new)
+    return result
+
+
+def month_start(moment):
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def record_transaction(ledger_entry):
+    """Fold a new Transaction into its monthly TransactionRollup row."""
+    month = month_start(ledger_entry.created_at)
+    side = 'paid' if ledger_entry.type == 'payment' else 'received'
+    updated = TransactionRollup.objects.filter(
+        user_id=ledger_entry.user_id, currency=ledger_entry.currency, month=month
+    ).update(count=F('count') + 1, **{side: F(side) + ledger_entry.amount})
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            TransactionRollup.objects.create(
+                user_id=ledger_entry.user_id,
+                currency=ledger_entry.currency,
+                month=month,
+                count=1,
+                **{side: ledger_entry.amount}
+            )
+    except IntegrityError:
+        record_transaction(ledger_entry)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from Users.conversations import rebuild_conversations
+
+
+class Command(BaseCommand):
+    help = 'Recompute the last message of every Conversation from the Message table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows written per query batch.')
+
+    def handle(self, *args, **options):
+        total = rebuild_conversations(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} conversations.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from Users.ledger import reconcile_ledger
+
+
+class Command(BaseCommand):
+    help = 'Check the cached sparks / credits columns against the Transaction ledger and write balance checkpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users reconciled per chunk.')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it or writing checkpoints.')
+
+    def handle(self, *args, **options):
+        fix = not options['dry_run']
+        result = reconcile_ledger(batch_size=options['batch_size'], fix=fix, checkpoint=fix)
+        for user_id, currency, cached, ledger in result['drifted']:
+            self.stdout.write(self.style.WARNING(f'User {user_id} {currency}: cached {cached}, ledger {ledger}'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {result['users']} users: {len(result['drifted'])} drifted, {result['checkpoints']} checkpoints written."
+        ))
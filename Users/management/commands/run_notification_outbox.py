@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from Users.outbox import drain_outbox, outbox_settings
+
+
+class Command(BaseCommand):
+    help = "Write queued outbox events as notifications (for NOTIFICATION_OUTBOX MODE 'command')."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Flush pending events once and exit.')
+        parser.add_argument('--interval', type=float, help='Seconds between flushes (defaults to FLUSH_INTERVAL).')
+
+    def handle(self, *args, **options):
+        settings = outbox_settings()
+        interval = options['interval'] or settings['FLUSH_INTERVAL']
+        while True:
+            written = drain_outbox(settings['BATCH_SIZE'])
+            if written:
+                self.stdout.write(f'Flushed {written} notifications.')
+            if options['once']:
+                break
+            close_old_connections()
+            time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS('Notification outbox flushed.'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-16 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0029_customuser_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='event_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1 on 2026-10-16 20:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_conversations(apps, schema_editor):
+    Message = apps.get_model('Users', 'Message')
+    Conversation = apps.get_model('Users', 'Conversation')
+
+    latest = {}
+    messages = Message.objects.order_by('created_at', 'id').values_list('sender_id', 'receiver_id', 'message', 'created_at')
+    for sender_id, receiver_id, text, created_at in messages.iterator(chunk_size=1000):
+        latest[tuple(sorted((sender_id, receiver_id)))] = (sender_id, text, created_at)
+
+    Conversation.objects.bulk_create(
+        [
+            Conversation(
+                user_a_id=user_a,
+                user_b_id=user_b,
+                last_message_at=created_at,
+                last_message=text[:255],
+                last_sender_id=sender_id,
+            )
+            for (user_a, user_b), (sender_id, text, created_at) in latest.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0031_notification_user_read_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField()),
+                ('last_message', models.CharField(blank=True, max_length=255)),
+                ('unread_a', models.PositiveIntegerField(default=0)),
+                ('unread_b', models.PositiveIntegerField(default=0)),
+                ('last_sender', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_a', to=settings.AUTH_USER_MODEL)),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_b', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_message_at'],
+                'indexes': [models.Index(fields=['user_a', '-last_message_at'], name='conversation_a_recent_idx'), models.Index(fields=['user_b', '-last_message_at'], name='conversation_b_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user_a', 'user_b'), name='conversation_pair_unique'), models.CheckConstraint(condition=models.Q(('user_a__lte', models.F('user_b'))), name='conversation_pair_ordered')],
+            },
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
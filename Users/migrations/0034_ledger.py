@@ -0,0 +1,110 @@
+# Generated by Django 5.1 on 2026-10-16 20:52
+
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def open_ledger(apps, schema_editor):
+    """Opening checkpoints take the current balance columns as given, including every Transaction so far."""
+    CustomUser = apps.get_model('Users', 'CustomUser')
+    Transaction = apps.get_model('Users', 'Transaction')
+    BalanceCheckpoint = apps.get_model('Users', 'BalanceCheckpoint')
+    TransactionRollup = apps.get_model('Users', 'TransactionRollup')
+
+    last_ids = {
+        (row['user'], row['currency']): row['last']
+        for row in Transaction.objects.order_by().values('user', 'currency').annotate(last=Max('id'))
+    }
+    checkpoints = []
+    for user_id, sparks, credits in CustomUser.objects.values_list('id', 'sparks', 'credits').iterator(chunk_size=1000):
+        for currency, balance in (('spark', sparks), ('ember', credits)):
+            checkpoints.append(BalanceCheckpoint(
+                user_id=user_id, currency=currency, balance=balance or 0, transaction_id=last_ids.get((user_id, currency), 0)
+            ))
+    BalanceCheckpoint.objects.bulk_create(checkpoints, batch_size=1000)
+
+    # Legacy rows with unusable timestamps (e.g. '0' on SQLite) cannot be put in a month;
+    # they still count towards the opening checkpoints above
+    rollups = (
+        Transaction.objects.filter(created_at__gte=datetime(2000, 1, 1, tzinfo=timezone.utc))
+        .order_by()
+        .annotate(month=TruncMonth('created_at'))
+        .values('user', 'currency', 'month')
+        .annotate(
+            received=Sum('amount', filter=~Q(type='payment'), default=0),
+            paid=Sum('amount', filter=Q(type='payment'), default=0),
+            count=Count('id'),
+        )
+    )
+    TransactionRollup.objects.bulk_create(
+        [
+            TransactionRollup(
+                user_id=row['user'], currency=row['currency'], month=row['month'].date(),
+                received=row['received'], paid=row['paid'], count=row['count'],
+            )
+            for row in rollups
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0033_message_window_notification_read_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(choices=[('ember', 'Ember'), ('spark', 'Spark')], max_length=255)),
+                ('balance', models.BigIntegerField()),
+                ('transaction_id', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(choices=[('ember', 'Ember'), ('spark', 'Spark')], max_length=255)),
+                ('month', models.DateField()),
+                ('received', models.BigIntegerField(default=0)),
+                ('paid', models.BigIntegerField(default=0)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'currency', 'id'], name='transaction_ledger_idx'),
+        ),
+        migrations.AddField(
+            model_name='balancecheckpoint',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='transactionrollup',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transaction_rollups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='balancecheckpoint',
+            index=models.Index(fields=['user', 'currency', '-transaction_id'], name='checkpoint_latest_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='transactionrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'currency', 'month'), name='transaction_rollup_unique'),
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
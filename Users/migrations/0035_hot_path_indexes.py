@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-16 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0034_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at', '-id'], name='notification_unread_idx'),
+        ),
+        # Superseded by the prefix of notification_unread_idx; dropped once the new index exists
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_user_read_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notification_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='transaction_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'type', '-created_at', '-id'], name='transaction_user_type_idx'),
+        ),
+    ]
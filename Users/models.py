@@ -1,3 +1,4 @@
+import uuid
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.db import models
 
@@ -42,6 +43,9 @@ class CustomUser(AbstractUser):
     
     sparks = models.IntegerField(default=100)
 
+    # Bumped on every profile write; used for ETag / Last-Modified validators
+    updated_at = models.DateTimeField(auto_now=True)
+
     groups = models.ManyToManyField(
         Group,
         related_name="customuser_set",  # Custom related name
@@ -71,14 +75,48 @@ class Notification(models.Model):
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    # When is_read was last set; lets clients sync read state incrementally (see Users/sync.py)
+    read_at = models.DateTimeField(null=True, blank=True)
+    # Set by the outbox (Users/outbox.py) so replayed events are written only once
+    event_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread lists in keyset order; its (user, is_read) prefix covers the counter recounts
+            models.Index(fields=['user', 'is_read', '-created_at', '-id'], name='notification_unread_idx'),
+            # The full notification list in keyset order
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_recent_idx'),
+            models.Index(fields=['user', 'read_at'], name='notification_user_read_at_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored read state so signals.py can keep the unread counter in sync
+        if 'is_read' in field_names:
+            instance._loaded_is_read = instance.is_read
+        return instance
 
     def __str__(self):
         return self.user.username
     
 
+class OutboxEvent(models.Model):
+    """A notification queued inside the sender's transaction, until the outbox flusher writes it (see Users/outbox.py)."""
+    event_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(CustomUser, related_name='+', on_delete=models.CASCADE)
+    type = models.CharField(max_length=255, choices=Notification.NOTIFICATION_TYPE_CHOICES)
+    url = models.URLField()
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_by = models.CharField(max_length=32, blank=True, default='')
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.user_id} {self.type} {self.event_id}'
+
+
 class Transaction(models.Model):
     CURRENCY_CHOICES = (
         ('ember', 'Ember'),
@@ -96,8 +134,62 @@ class Transaction(models.Model):
     description = models.CharField(max_length=255, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # The ledger (see Users/ledger.py) is append-only and the source of truth for
+    # balances; CustomUser.sparks / credits are caches of it
+    BALANCE_COLUMNS = {'spark': 'sparks', 'ember': 'credits'}
+
+    class Meta:
+        indexes = [
+            # Balance tails after a checkpoint
+            models.Index(fields=['user', 'currency', 'id'], name='transaction_ledger_idx'),
+            # Transaction history in keyset order, all types or one
+            models.Index(fields=['user', '-created_at', '-id'], name='transaction_user_recent_idx'),
+            models.Index(fields=['user', 'type', '-created_at', '-id'], name='transaction_user_type_idx'),
+        ]
+
+    @property
+    def signed_amount(self):
+        return -self.amount if self.type == 'payment' else self.amount
+
     def __str__(self):
         return self.user.username
+
+
+class BalanceCheckpoint(models.Model):
+    """A user's balance in one currency including every Transaction up to ``transaction_id``."""
+    user = models.ForeignKey(CustomUser, related_name='balance_checkpoints', on_delete=models.CASCADE)
+    currency = models.CharField(max_length=255, choices=Transaction.CURRENCY_CHOICES)
+    balance = models.BigIntegerField()
+    # Highest Transaction id folded into the balance (0 for an opening balance)
+    transaction_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'currency', '-transaction_id'], name='checkpoint_latest_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.currency} {self.balance} @ {self.transaction_id}'
+
+
+class TransactionRollup(models.Model):
+    """Per-user monthly totals, maintained on every Transaction insert."""
+    user = models.ForeignKey(CustomUser, related_name='transaction_rollups', on_delete=models.CASCADE)
+    currency = models.CharField(max_length=255, choices=Transaction.CURRENCY_CHOICES)
+    month = models.DateField()  # First day of the month
+    received = models.BigIntegerField(default=0)
+    paid = models.BigIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'currency', 'month'], name='transaction_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.currency} {self.month:%Y-%m}'
     
 
 class Subscriber(models.Model):
@@ -115,6 +207,45 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Windowed thread reads (see UserMessagesView)
+            models.Index(fields=['sender', 'receiver', 'created_at'], name='message_thread_idx'),
+        ]
+
+    def __str__(self):
+        return self.user.username
+
+class Conversation(models.Model):
+    """
+    One row per pair of users who have exchanged messages, kept up to date on
+    every message insert (see Users/conversations.py) so the inbox is a single
+    indexed query. ``user_a`` is always the participant with the lower id.
+    """
+    PREVIEW_LENGTH = 255
+
+    user_a = models.ForeignKey(CustomUser, related_name='conversations_as_a', on_delete=models.CASCADE)
+    user_b = models.ForeignKey(CustomUser, related_name='conversations_as_b', on_delete=models.CASCADE)
+    last_message_at = models.DateTimeField()
+    last_message = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    last_sender = models.ForeignKey(CustomUser, related_name='+', null=True, on_delete=models.SET_NULL)
+    # Messages each side has not read yet
+    unread_a = models.PositiveIntegerField(default=0)
+    unread_b = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-last_message_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user_a', 'user_b'], name='conversation_pair_unique'),
+            models.CheckConstraint(condition=models.Q(user_a__lte=models.F('user_b')), name='conversation_pair_ordered'),
+        ]
+        indexes = [
+            models.Index(fields=['user_a', '-last_message_at'], name='conversation_a_recent_idx'),
+            models.Index(fields=['user_b', '-last_message_at'], name='conversation_b_recent_idx'),
+        ]
+
+    @staticmethod
+    def pair(first_id, second_id):
+        return (first_id, second_id) if first_id <= second_id else (second_id, first_id)
 
     def __str__(self):
-        return self.user.username
\ No newline at end of file
+        return f'{self.user_a_id} <-> {self.user_b_id}'
@@ -0,0 +1,188 @@
+"""
+Transactional outbox for Notification rows.
+
+Views call ``queue_notification(...)`` instead of ``Notification.objects.create``.
+The event is stored as an ``OutboxEvent`` row inside the caller's transaction,
+so it commits or rolls back with the business write and nothing can fail or be
+lost between the two. A flusher later moves batches of events to Notification
+with ``bulk_create`` and deletes them in the same transaction; replays are made
+idempotent by the unique ``Notification.event_id``.
+
+Flushers in several processes share the table. Each claims its batch with a
+conditional UPDATE of ``claimed_by`` before writing it, so every event is
+written and published by one flusher (SQLite has no ``SKIP LOCKED``). Claims of
+a flusher that died are taken over after ``CLAIM_TIMEOUT`` seconds.
+
+Modes (``settings.NOTIFICATION_OUTBOX['MODE']``):
+
+* ``thread``  - a daemon thread in each process drains the outbox table. It is
+  started with the WSGI/ASGI application, so events left over from a crash or
+  restart are written on startup.
+* ``command`` - ``manage.py run_notification_outbox`` drains it, for deployments
+  that cannot keep background threads (e.g. serverless).
+* ``sync``    - write immediately inside the current transaction (used by tests).
+"""
+import atexit
+import logging
+import os
+import threading
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from api import metrics
+from .counters import invalidate_unread
+from .events import publish_notifications
+from .models import Notification, OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_settings():
+    options = {
+        'MODE': 'thread',
+        'BATCH_SIZE': 100,
+        'FLUSH_INTERVAL': 1.0,
+        'CLAIM_TIMEOUT': 60.0,
+    }
+    options.update(getattr(settings, 'NOTIFICATION_OUTBOX', {}))
+    return options
+
+
+def queue_notification(user, type, url, message):
+    """Queue a Notification in the current transaction; it is written once the transaction commits."""
+    event = OutboxEvent(user_id=getattr(user, 'pk', user), type=type, url=url, message=message)
+    options = outbox_settings()
+    if options['MODE'] == 'sync':
+        write_events([event])
+        metrics.inc('notifications_queued_total', type=type)
+        return
+
+    event.save()
+
+    def queued():
+        metrics.inc('notifications_queued_total', type=type)
+        if options['MODE'] == 'thread':
+            get_worker().wake()
+
+    transaction.on_commit(queued)
+
+
+def write_events(events, batch_size=None):
+    """Insert events as Notification rows and return the new rows; events already written are skipped."""
+    written = set(Notification.objects.filter(event_id__in=[event.event_id for event in events]).values_list('event_id', flat=True))
+    notifications = [
+        Notification(event_id=event.event_id, user_id=event.user_id, type=event.type, url=event.url, message=event.message)
+        for event in events if event.event_id not in written
+    ]
+    if not notifications:
+        return []
+    Notification.objects.bulk_create(notifications, batch_size=batch_size, ignore_conflicts=True)
+    # ignore_conflicts leaves the primary keys unset, so read the rows back to publish their ids
+    notifications = list(Notification.objects.filter(event_id__in=[notification.event_id for notification in notifications]).order_by('id'))
+    # bulk_create skips signals, so recount these users
+    invalidate_unread(*{notification.user_id for notification in notifications})
+    publish_notifications(notifications)
+    return notifications
+
+
+def claim_events(batch_size):
+    """Claim up to ``batch_size`` queued events for this flusher; returns the claim and the events."""
+    claim = uuid.uuid4().hex
+    now = timezone.now()
+    claimable = Q(claimed_by='') | Q(claimed_at__lt=now - timedelta(seconds=outbox_settings()['CLAIM_TIMEOUT']))
+    with transaction.atomic():
+        ids = list(OutboxEvent.objects.filter(claimable).order_by('id').values_list('id', flat=True)[:batch_size])
+        # Conditional on the row still being claimable, so a concurrent flusher cannot take it too
+        OutboxEvent.objects.filter(claimable, id__in=ids).update(claimed_by=claim, claimed_at=now)
+    return claim, list(OutboxEvent.objects.filter(claimed_by=claim).order_by('id'))
+
+
+def drain_outbox(batch_size=None):
+    """Move queued events to Notification, a batch per transaction. Returns the number of events written."""
+    batch_size = batch_size or outbox_settings()['BATCH_SIZE']
+    written = 0
+    while True:
+        claim, events = claim_events(batch_size)
+        if not events:
+            return written
+        try:
+            with transaction.atomic():
+                write_events(events, batch_size=batch_size)
+                OutboxEvent.objects.filter(claimed_by=claim).delete()
+        except BaseException:
+            # Give the batch back for the next attempt instead of waiting for CLAIM_TIMEOUT
+            OutboxEvent.objects.filter(claimed_by=claim).update(claimed_by='', claimed_at=None)
+            raise
+        written += len(events)
+
+
+class OutboxWorker(threading.Thread):
+    """Background thread that drains the outbox table on start and every FLUSH_INTERVAL seconds."""
+
+    def __init__(self):
+        super().__init__(name='notification-outbox', daemon=True)
+        self.pid = os.getpid()
+        self.wakeup = threading.Event()
+        self.lock = threading.Lock()
+        self.pending = 0
+
+    def wake(self):
+        # Flush early once a full batch is waiting
+        with self.lock:
+            self.pending += 1
+            full = self.pending >= outbox_settings()['BATCH_SIZE']
+        if full:
+            self.wakeup.set()
+
+    def flush(self):
+        with self.lock:
+            self.pending = 0
+        try:
+            drain_outbox()
+        except Exception:
+            logger.exception('Notification outbox flush failed; events stay queued for the next attempt')
+        finally:
+            close_old_connections()
+
+    def run(self):
+        while True:
+            self.flush()
+            self.wakeup.wait(outbox_settings()['FLUSH_INTERVAL'])
+            self.wakeup.clear()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+    with _worker_lock:
+        # Re-create after fork: threads do not survive into the child process
+        if _worker is None or _worker.pid != os.getpid():
+            _worker = OutboxWorker()
+            _worker.start()
+            atexit.register(_worker.flush)
+    return _worker
+
+
+def start_worker():
+    """Start this process's outbox thread in 'thread' mode (called by api/wsgi.py and api/asgi.py)."""
+    if outbox_settings()['MODE'] == 'thread':
+        get_worker()
+
+
+def restart_after_fork():
+    global _worker_lock
+    # The parent's lock may have been held by another thread at fork time
+    _worker_lock = threading.Lock()
+    # Servers that load the application before forking (gunicorn --preload) started the thread in the parent
+    if _worker is not None:
+        get_worker()
+
+
+os.register_at_fork(after_in_child=restart_after_fork)
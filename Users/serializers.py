@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import CustomUser, Notification, Transaction, Subscriber, Message
+from api.fieldsets import SparseFieldsetSerializerMixin
+from .models import CustomUser, Notification, Transaction, TransactionRollup, Subscriber, Message, Conversation
 from datetime import datetime
 
 class CreateUserSerializer(serializers.ModelSerializer):
@@ -63,7 +64,7 @@ class CreateUserSerializer(serializers.ModelSerializer):
         return user
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields ='__all__'
@@ -102,11 +103,11 @@ class CustomUserSerializer(serializers.ModelSerializer):
         # Add any additional cross-field validation if necessary
         return super().validate(attrs)
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = '__all__'
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'created_at', 'read_at']
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -116,6 +117,12 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class TransactionRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TransactionRollup
+        fields = ['currency', 'month', 'received', 'paid', 'count']
+
+
 class SubscriberSerializer(serializers.ModelSerializer):
     
     class Meta:
@@ -137,7 +144,33 @@ class SubscriberSerializer(serializers.ModelSerializer):
 
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class ConversationParticipantSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'first_name', 'last_name', 'user_title', 'profile_image']
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """A Conversation as seen by the requesting user: the other participant and their own unread count."""
+    other_user = serializers.SerializerMethodField()
+    unread = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'other_user', 'last_message', 'last_message_at', 'last_sender', 'unread']
+
+    def is_user_a(self, conversation):
+        return conversation.user_a_id == self.context['request'].user.id
+
+    def get_other_user(self, conversation):
+        other = conversation.user_b if self.is_user_a(conversation) else conversation.user_a
+        return ConversationParticipantSerializer(other, context=self.context).data
+
+    def get_unread(self, conversation):
+        return conversation.unread_a if self.is_user_a(conversation) else conversation.unread_b
+
+
+class MessageSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Message
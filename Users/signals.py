@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from api import metrics
+from api.authentication import invalidate_cached_user
+from .conversations import record_message
+from .counters import adjust_unread
+from .events import publish_message, publish_notifications
+from .ledger import open_balances, record_transaction
+from .models import CustomUser, Message, Notification, Transaction
+
+
+@receiver(pre_save, sender=Notification)
+def track_read_state(sender, instance, **kwargs):
+    # Instances loaded from the database already know their stored state
+    if not instance._state.adding and not hasattr(instance, '_loaded_is_read'):
+        instance._loaded_is_read = Notification.objects.filter(pk=instance.pk).values_list('is_read', flat=True).first()
+    # Stamp the transition to read for delta syncs
+    if instance.is_read and not getattr(instance, '_loaded_is_read', False):
+        instance.read_at = timezone.now()
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_on_save(sender, instance, created, **kwargs):
+    previous = True if created else instance._loaded_is_read
+    if created and not instance.is_read:
+        adjust_unread(instance.user_id, 1)
+        publish_notifications([instance])
+    elif previous is not None and previous != instance.is_read:
+        adjust_unread(instance.user_id, -1 if instance.is_read else 1)
+    instance._loaded_is_read = instance.is_read
+
+
+@receiver(post_delete, sender=Notification)
+def update_unread_on_delete(sender, instance, **kwargs):
+    if not getattr(instance, '_loaded_is_read', instance.is_read):
+        adjust_unread(instance.user_id, -1)
+
+
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created, **kwargs):
+    if created:
+        record_message(instance)
+        publish_message(instance)
+
+
+@receiver(post_save, sender=CustomUser)
+def open_user_ledger(sender, instance, created, **kwargs):
+    if created:
+        open_balances(instance)
+
+
+@receiver(post_save, sender=Transaction)
+def roll_up_transaction(sender, instance, created, **kwargs):
+    if created:
+        record_transaction(instance)
+
+
+@receiver(post_save, sender=Transaction)
+def count_spent_sparks(sender, instance, created, **kwargs):
+    if created and instance.currency == 'spark' and instance.type == 'payment':
+        amount = instance.amount
+        transaction.on_commit(lambda: metrics.inc('sparks_spent_total', amount))
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_cached_user(sender, instance, **kwargs):
+    # Profile updates, password changes (set_password + save) and deletions
+    invalidate_cached_user(instance.pk)
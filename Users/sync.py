@@ -0,0 +1,61 @@
+import base64
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from .models import Notification
+
+
+# Read-state changes committed slightly after a delta was computed are picked up
+# by the next delta instead of being lost; re-sending a read id is harmless.
+READ_OVERLAP = timedelta(seconds=5)
+DELTA_LIMIT = 100
+
+
+def encode_sync_cursor(last_id, read_since):
+    raw = f'{last_id}|{read_since.isoformat() if read_since else ""}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_sync_cursor(cursor):
+    if not cursor:
+        return 0, None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        last_id, read_since = raw.split('|', 1)
+        read_since = parse_datetime(read_since) if read_since else None
+        return int(last_id), read_since
+    except (TypeError, ValueError, UnicodeError):
+        raise NotFound('Invalid cursor')
+
+
+def notification_delta(user_id, cursor, serializer_class):
+    """
+    What changed in a user's notifications since ``cursor``: new unread rows and
+    the ids of older rows that have been marked read. An empty cursor starts a
+    full sync; every response carries the cursor for the next call.
+    """
+    last_id, read_since = decode_sync_cursor(cursor)
+    now = timezone.now()
+
+    new = list(
+        Notification.objects.filter(user=user_id, is_read=False, id__gt=last_id).order_by('id')[:DELTA_LIMIT + 1]
+    )
+    has_more = len(new) > DELTA_LIMIT
+    new = new[:DELTA_LIMIT]
+
+    read_ids = []
+    if read_since is not None:
+        read_ids = list(
+            Notification.objects.filter(user=user_id, id__lte=last_id, read_at__gt=read_since)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    next_id = new[-1].id if new else last_id
+    return {
+        'results': serializer_class(new, many=True).data,
+        'read_ids': read_ids,
+        'has_more': has_more,
+        'cursor': encode_sync_cursor(next_id, now - READ_OVERLAP),
+    }
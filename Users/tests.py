@@ -1,8 +1,24 @@
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.test import APITestCase, APIClient
-from .models import CustomUser, Notification, Transaction
+from api.authentication import CachedJWTAuthentication
+from .models import BalanceCheckpoint, Conversation, CustomUser, Message, Notification, OutboxEvent, Transaction, TransactionRollup
+from .events import broker, fetch_since, latest_cursor, parse_cursor, pubsub_events
+from .ledger import ledger_balance, reconcile_ledger
+from .outbox import OutboxWorker, claim_events, drain_outbox, queue_notification, write_events
 
 class CreateUserViewTests(APITestCase):
 
@@ -19,6 +35,7 @@ class CreateUserViewTests(APITestCase):
             'interests': ['Machine Learning'],
         }
 
+    @override_settings(NOTIFICATION_OUTBOX={'MODE': 'sync'})
     def test_create_user_success(self):
         response = self.client.post(self.url, self.valid_data, format='json')
         
@@ -114,6 +131,22 @@ class CurrentUserViewSetTests(APITestCase):
         self.assertEqual(self.user.last_name, 'updateduser')
 
 
+    def test_retrieve_current_user_not_modified(self):
+        response = self.client.get(self.url, format='json')
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Any profile write produces a new ETag
+        self.client.patch(self.url, {'first_name': 'changed'}, format='json')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_current_user_stale_if_match(self):
+        response = self.client.patch(self.url, {'first_name': 'updateduser'}, format='json', HTTP_IF_MATCH='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
     def test_delete_current_user(self):
         # Test deleting the current authenticated user
         response = self.client.delete(self.url, format='json')
@@ -243,7 +276,456 @@ class TransactionListTests(APITestCase):
         self.assertEqual(len(response.data), 1)  # Should return only sent transactions
         self.assertEqual(response.data[0]['amount'], 50)  # Check content
 
+    def test_get_transactions_cursor_pagination(self):
+        response = self.client.get(f'{self.received_url}?cursor=&page_size=1', **{'HTTP_AUTHORIZATION': f'Bearer {self.token}'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['amount'], 50)  # Newest first
+
+        response = self.client.get(response.data['next'], **{'HTTP_AUTHORIZATION': f'Bearer {self.token}'}, format='json')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['amount'], 100)
+        self.assertIsNone(response.data['next'])
+
     def test_get_transactions_unauthenticated(self):
         self.client.logout()  # Log out the user
         response = self.client.get(self.received_url)
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)  # Expecting forbidden for unauthenticated user
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)  # Expecting forbidden for unauthenticated user
+
+class NotificationOutboxTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='outboxuser',
+            email='outboxuser@example.com',
+            password='testpassword'
+        )
+        self.options = {'MODE': 'command', 'BATCH_SIZE': 2, 'FLUSH_INTERVAL': 1.0}
+
+    def queue(self, count):
+        with override_settings(NOTIFICATION_OUTBOX=self.options):
+            with self.captureOnCommitCallbacks(execute=True):
+                for index in range(count):
+                    queue_notification(user=self.user, type='project', url='/dashboard', message=f'Event {index}')
+
+    def test_events_are_queued_until_flushed(self):
+        self.queue(3)
+        self.assertFalse(Notification.objects.filter(user=self.user).exists())
+        self.assertEqual(OutboxEvent.objects.count(), 3)
+        self.assertEqual(drain_outbox(batch_size=2), 3)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 3)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_rolled_back_events_are_not_queued(self):
+        with override_settings(NOTIFICATION_OUTBOX=self.options):
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        queue_notification(user=self.user, type='bid', url='/dashboard', message='Rolled back')
+                        raise IntegrityError
+                except IntegrityError:
+                    pass
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(drain_outbox(), 0)
+
+    def test_replayed_flush_writes_each_event_once(self):
+        self.queue(2)
+        # Simulate a flusher that wrote the rows but died before deleting the events
+        written = write_events(list(OutboxEvent.objects.all()))
+        self.assertTrue(all(notification.id for notification in written))
+        self.assertEqual(drain_outbox(), 2)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)
+        # Nothing is returned (or published) for events that were already written
+        replayed = OutboxEvent(event_id=written[0].event_id, user=self.user, type='project', url='/dashboard', message='Event 0')
+        self.assertEqual(write_events([replayed]), [])
+
+    def test_flushers_claim_disjoint_batches(self):
+        self.queue(3)
+        with override_settings(NOTIFICATION_OUTBOX=self.options):
+            first, first_events = claim_events(2)
+            second, second_events = claim_events(2)
+            self.assertEqual(len(first_events), 2)
+            self.assertEqual(len(second_events), 1)
+            self.assertFalse({event.id for event in first_events} & {event.id for event in second_events})
+            self.assertEqual(claim_events(2)[1], [])
+
+    def test_abandoned_claims_are_taken_over(self):
+        self.queue(2)
+        with override_settings(NOTIFICATION_OUTBOX=self.options):
+            claim_events(2)  # A flusher that died before writing
+            self.assertEqual(drain_outbox(), 0)
+            OutboxEvent.objects.update(claimed_at=timezone.now() - timedelta(minutes=5))
+            self.assertEqual(drain_outbox(), 2)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)
+
+    def test_worker_counts_wakeups_across_threads(self):
+        worker = OutboxWorker()
+        with override_settings(NOTIFICATION_OUTBOX={**self.options, 'BATCH_SIZE': 400}):
+            threads = [threading.Thread(target=lambda: [worker.wake() for _ in range(100)]) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(worker.pending, 400)
+        self.assertTrue(worker.wakeup.is_set())
+
+    def test_worker_drains_before_waiting(self):
+        worker = OutboxWorker()
+        with mock.patch('Users.outbox.drain_outbox') as drain, mock.patch('Users.outbox.close_old_connections'):
+            # Stop the loop at its first wait
+            with mock.patch.object(worker.wakeup, 'wait', side_effect=SystemExit), self.assertRaises(SystemExit):
+                worker.run()
+        drain.assert_called_once_with()
+
+
+class NotificationCounterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='counteruser',
+            email='counteruser@example.com',
+            password='testpassword'
+        )
+        self.notifications = [
+            Notification.objects.create(user=self.user, message=f'Notification {index}') for index in range(3)
+        ]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.count_url = reverse('notification-count')
+        self.mark_read_url = reverse('notifications-mark-read')
+
+    def test_count_is_served_from_cache(self):
+        self.assertEqual(self.client.get(self.count_url).data, {'unread': 3})
+        with self.assertNumQueries(0):  # The view trusts the token claims, so not even a user lookup
+            self.assertEqual(self.client.get(self.count_url).data, {'unread': 3})
+
+    def test_counter_follows_inserts_and_reads(self):
+        self.client.get(self.count_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.user, message='Another one')
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.get(pk=self.notifications[0].pk)
+            notification.is_read = True
+            notification.save()
+        self.assertEqual(self.client.get(self.count_url).data, {'unread': 3})
+
+    def test_mark_ids_read_in_one_update(self):
+        self.client.get(self.count_url)
+        ids = [self.notifications[0].id, self.notifications[1].id]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.mark_read_url, {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'updated': 2})
+        self.assertEqual(self.client.get(self.count_url).data, {'unread': 1})
+
+    def test_mark_all_read(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.mark_read_url, {'all': True}, format='json')
+        self.assertEqual(response.data, {'updated': 3})
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=False).exists())
+        self.assertEqual(self.client.get(self.count_url).data, {'unread': 0})
+
+    def test_mark_read_ignores_other_users_notifications(self):
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='testpassword')
+        foreign = Notification.objects.create(user=other, message='Not yours')
+        response = self.client.post(self.mark_read_url, {'ids': [foreign.id]}, format='json')
+        self.assertEqual(response.data, {'updated': 0})
+        foreign.refresh_from_db()
+        self.assertFalse(foreign.is_read)
+
+    def test_mark_read_requires_ids_or_all(self):
+        response = self.client.post(self.mark_read_url, {'ids': 'everything'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EventStreamTests(APITestCase):
+    options = {'MODE': 'pubsub', 'POLL_INTERVAL': 0.01, 'HEARTBEAT': 0.05, 'QUEUE_SIZE': 10}
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='streamuser',
+            email='streamuser@example.com',
+            password='testpassword'
+        )
+        self.other = CustomUser.objects.create_user(
+            username='streamsender',
+            email='streamsender@example.com',
+            password='testpassword'
+        )
+
+    async def test_pubsub_stream_delivers_published_events(self):
+        stream = pubsub_events(42, self.options)
+        self.assertEqual(await anext(stream), ': connected\n\n')
+        broker.publish(42, 'message', {'message': 'Hello'})
+        self.assertEqual(await anext(stream), 'event: message\ndata: {"message": "Hello"}\n\n')
+        await stream.aclose()
+        self.assertFalse(broker.has_subscribers(42))
+
+    async def test_idle_pubsub_stream_sends_heartbeats(self):
+        stream = pubsub_events(43, self.options)
+        await anext(stream)
+        self.assertEqual(await anext(stream), ': heartbeat\n\n')
+        await stream.aclose()
+
+    def test_poll_cursor_returns_only_newer_rows(self):
+        cursor = latest_cursor(self.user.id)
+        notification = Notification.objects.create(user=self.user, message='New bid')
+        message = Message.objects.create(sender=self.other, receiver=self.user, message='Hi')
+        Message.objects.create(sender=self.user, receiver=self.other, message='Not for this stream')
+
+        events, cursor = fetch_since(self.user.id, cursor)
+        self.assertEqual([event for event, data, event_id in events], ['notification', 'message'])
+        self.assertEqual(cursor, (notification.id, message.id))
+        self.assertEqual(parse_cursor(events[-1][2]), cursor)
+        self.assertEqual(fetch_since(self.user.id, cursor), ([], cursor))
+
+    def test_stream_requires_a_valid_token(self):
+        url = reverse('event-stream')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get(f'{url}?token=invalid').status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConversationTests(APITestCase):
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='testpassword')
+        self.bob = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='testpassword')
+        self.carol = CustomUser.objects.create_user(username='carol', email='carol@example.com', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.bob).access_token}')
+        self.inbox_url = reverse('user-conversations')
+
+    def test_messages_update_one_row_per_pair(self):
+        Message.objects.create(sender=self.bob, receiver=self.alice, message='Hi Alice')
+        Message.objects.create(sender=self.alice, receiver=self.bob, message='Hi Bob')
+        Message.objects.create(sender=self.alice, receiver=self.bob, message='Are you there?')
+
+        conversation = Conversation.objects.get()
+        self.assertEqual((conversation.user_a, conversation.user_b), (self.alice, self.bob))
+        self.assertEqual(conversation.last_message, 'Are you there?')
+        self.assertEqual(conversation.last_sender, self.alice)
+        self.assertEqual((conversation.unread_a, conversation.unread_b), (1, 2))
+
+    def test_inbox_is_ordered_by_recency_with_own_unread_count(self):
+        Message.objects.create(sender=self.alice, receiver=self.bob, message='From Alice')
+        Message.objects.create(sender=self.carol, receiver=self.bob, message='From Carol')
+
+        with self.assertNumQueries(1):  # Just the inbox; the view trusts the token claims
+            response = self.client.get(self.inbox_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['other_user']['id'] for row in response.data], [self.carol.id, self.alice.id])
+        self.assertEqual([row['unread'] for row in response.data], [1, 1])
+        self.assertEqual(response.data[0]['last_message'], 'From Carol')
+
+    def test_reading_a_thread_resets_unread(self):
+        Message.objects.create(sender=self.alice, receiver=self.bob, message='One')
+        Message.objects.create(sender=self.alice, receiver=self.bob, message='Two')
+
+        response = self.client.get(reverse('user-messages'), {'other_user': self.alice.id})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(Conversation.objects.get().unread_b, 0)
+
+    def test_rebuild_restores_last_message(self):
+        Message.objects.create(sender=self.alice, receiver=self.bob, message='Latest')
+        Conversation.objects.update(last_message='stale')
+        call_command('rebuild_conversations', stdout=StringIO())
+        self.assertEqual(Conversation.objects.get().last_message, 'Latest')
+
+
+class MessageWindowTests(APITestCase):
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='testpassword')
+        self.bob = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='testpassword')
+        self.messages = [
+            Message.objects.create(sender=sender, receiver=receiver, message=f'Message {index}')
+            for index, (sender, receiver) in enumerate([(self.alice, self.bob), (self.bob, self.alice)] * 3)
+        ]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.bob).access_token}')
+        self.url = reverse('user-messages')
+
+    def ids(self, response):
+        return [message['id'] for message in response.data['results']]
+
+    def test_latest_window_is_returned_oldest_first(self):
+        response = self.client.get(self.url, {'other_user': self.alice.id, 'page_size': 4})
+        self.assertEqual(self.ids(response), [message.id for message in self.messages[2:]])
+        self.assertTrue(response.data['has_more'])
+
+    def test_before_id_scrolls_back(self):
+        response = self.client.get(self.url, {'other_user': self.alice.id, 'page_size': 4, 'before_id': self.messages[2].id})
+        self.assertEqual(self.ids(response), [self.messages[0].id, self.messages[1].id])
+        self.assertFalse(response.data['has_more'])
+
+    def test_after_id_returns_only_newer_messages(self):
+        response = self.client.get(self.url, {'other_user': self.alice.id, 'after_id': self.messages[3].id})
+        self.assertEqual(self.ids(response), [self.messages[4].id, self.messages[5].id])
+        self.assertFalse(response.data['has_more'])
+
+    def test_invalid_anchor(self):
+        response = self.client.get(self.url, {'other_user': self.alice.id, 'after_id': 'latest'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NotificationDeltaTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='deltauser', email='deltauser@example.com', password='testpassword')
+        self.first = Notification.objects.create(user=self.user, message='First')
+        self.second = Notification.objects.create(user=self.user, message='Second')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.url = reverse('user-notifications')
+
+    def test_initial_sync_returns_all_unread(self):
+        response = self.client.get(self.url, {'since': ''})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.first.id, self.second.id])
+        self.assertEqual(response.data['read_ids'], [])
+        self.assertTrue(response.data['cursor'])
+
+    def test_delta_returns_new_rows_and_read_ids(self):
+        cursor = self.client.get(self.url, {'since': ''}).data['cursor']
+        third = Notification.objects.create(user=self.user, message='Third')
+        self.client.patch(reverse('notification-detail', args=[self.first.id]), {'is_read': True}, format='json')
+        self.client.post(reverse('notifications-mark-read'), {'ids': [self.second.id]}, format='json')
+
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual([row['id'] for row in response.data['results']], [third.id])
+        self.assertEqual(response.data['read_ids'], [self.first.id, self.second.id])
+
+        response = self.client.get(self.url, {'since': response.data['cursor']})
+        self.assertEqual(response.data['results'], [])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class LedgerTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='ledgeruser', email='ledgeruser@example.com', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_new_users_open_at_their_starting_balance(self):
+        self.assertEqual(ledger_balance(self.user.id, 'spark'), 100)
+        self.assertEqual(ledger_balance(self.user.id, 'ember'), 0)
+
+    def test_balance_is_checkpoint_plus_signed_tail(self):
+        Transaction.objects.create(user=self.user, currency='spark', type='received', amount=40)
+        Transaction.objects.create(user=self.user, currency='spark', type='payment', amount=15)
+        Transaction.objects.create(user=self.user, currency='ember', type='received', amount=7)
+        self.assertEqual(ledger_balance(self.user.id, 'spark'), 125)
+        self.assertEqual(ledger_balance(self.user.id, 'ember'), 7)
+
+    def test_reconcile_repairs_drift_and_checkpoints_settled_rows(self):
+        payment = Transaction.objects.create(user=self.user, currency='spark', type='payment', amount=30)
+        Transaction.objects.filter(pk=payment.pk).update(created_at=timezone.now() - timedelta(hours=1))
+
+        result = reconcile_ledger()
+        self.assertIn((self.user.id, 'spark', 100, 70), result['drifted'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.sparks, 70)
+
+        checkpoint = BalanceCheckpoint.objects.filter(user=self.user, currency='spark').order_by('-transaction_id').first()
+        self.assertEqual((checkpoint.balance, checkpoint.transaction_id), (70, payment.id))
+        self.assertEqual(ledger_balance(self.user.id, 'spark'), 70)
+        self.assertEqual(reconcile_ledger(), {'users': 1, 'drifted': [], 'checkpoints': 0})
+
+    def test_dry_run_reports_without_fixing(self):
+        Transaction.objects.create(user=self.user, currency='spark', type='payment', amount=30)
+        out = StringIO()
+        call_command('reconcile_ledger', '--dry-run', stdout=out)
+        self.assertIn('cached 100, ledger 70', out.getvalue())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.sparks, 100)
+
+    def test_summary_is_served_from_rollups(self):
+        Transaction.objects.create(user=self.user, currency='spark', type='received', amount=40)
+        Transaction.objects.create(user=self.user, currency='spark', type='payment', amount=15)
+        self.assertEqual(TransactionRollup.objects.count(), 1)
+
+        response = self.client.get(reverse('user-transactions-summary'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['balances'], {'spark': 125, 'ember': 0})
+        month = response.data['months'][0]
+        self.assertEqual((month['currency'], month['received'], month['paid'], month['count']), ('spark', 40, 15, 2))
+
+
+@override_settings(AUTH_USER_CACHE={'ENABLED': True, 'TIMEOUT': 60})
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='cacheduser',
+            email='cacheduser@example.com',
+            password='testpassword',
+            skills=['python'],
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.authentication = CachedJWTAuthentication()
+        self.token = self.authentication.get_validated_token(str(RefreshToken.for_user(self.user).access_token))
+
+    def test_user_is_resolved_from_cache_with_wide_columns_deferred(self):
+        self.authentication.get_user(self.token)
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+        self.assertEqual((user.pk, user.username), (self.user.pk, 'cacheduser'))
+        self.assertIn('skills', user.get_deferred_fields())
+        with self.assertNumQueries(1):
+            self.assertEqual(user.skills, ['python'])
+
+    def test_profile_update_invalidates_the_cached_user(self):
+        self.authentication.get_user(self.token)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertEqual(self.authentication.get_user(self.token).first_name, 'Renamed')
+
+    def test_deactivated_and_deleted_users_are_rejected(self):
+        self.authentication.get_user(self.token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+    def test_auto_does_not_cache_with_a_per_process_backend(self):
+        with override_settings(AUTH_USER_CACHE={'ENABLED': 'auto'}):
+            self.authentication.get_user(self.token)
+            # Deactivated by another worker: update() sends no signal, so nothing here is invalidated
+            CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+            with self.assertRaises(AuthenticationFailed):
+                self.authentication.get_user(self.token)
+
+    def test_current_user_view_serializes_the_full_profile(self):
+        response = self.client.get(reverse('current-user'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['skills'], ['python'])
+
+    def test_trusted_claims_user_id_matches_the_pk_type(self):
+        access = RefreshToken.for_user(self.user).access_token
+        access['user_id'] = str(self.user.id)  # As issued by recent simplejwt versions
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        request.parser_context = {'view': SimpleNamespace(trust_token_claims=True)}
+        with self.assertNumQueries(0):
+            user, _ = self.authentication.authenticate(request)
+        self.assertEqual(user.id, self.user.id)
+        self.assertIsInstance(user.id, int)
+
+
+class UserSparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='sparseuser',
+            email='sparseuser@example.com',
+            password='testpassword',
+            education=[{'school': 'Somewhere'}],
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_profile_fields_are_trimmed_and_not_read(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('customuser-detail', args=[self.user.id]), {'fields': 'id,username'})
+        self.assertEqual(response.data, {'id': self.user.id, 'username': 'sparseuser'})
+        profile_query = context.captured_queries[-1]['sql']
+        self.assertNotIn('"education"', profile_query)
+
+    def test_omit_on_messages(self):
+        other = CustomUser.objects.create_user(username='sparseother', email='sparseother@example.com', password='testpassword')
+        Message.objects.create(sender=other, receiver=self.user, message='Hello')
+        response = self.client.get(reverse('user-messages'), {'other_user': other.id, 'omit': 'message'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'created_at', 'sender', 'receiver'})
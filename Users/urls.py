@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CurrentUserViewSet, UserRetrieveUsernameWithEmailView, CreateUserView, UserViewSet, NotificationsList, MarkNotificationAsRead, TransactionList, SubscribersListView, UnSubscribeView, UserContactsView, UserMessagesView
+from .views import CurrentUserViewSet, UserRetrieveUsernameWithEmailView, CreateUserView, UserViewSet, NotificationsList, MarkNotificationAsRead, NotificationCountView, MarkNotificationsReadView, TransactionList, TransactionSummaryView, SubscribersListView, UnSubscribeView, UserContactsView, UserMessagesView, ConversationListView
+from .events import event_stream
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 
@@ -19,11 +20,16 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api-auth/', include('rest_framework.urls')),
     path('notifications/', NotificationsList.as_view(), name='user-notifications'),
+    path('notifications/count/', NotificationCountView.as_view(), name='notification-count'),
+    path('notifications/read/', MarkNotificationsReadView.as_view(), name='notifications-mark-read'),
     path('notifications/<int:pk>/', MarkNotificationAsRead.as_view(), name='notification-detail'),
+    path('events/', event_stream, name='event-stream'),
     path('transactions/', TransactionList.as_view(), name='user-transactions'),
+    path('transactions/summary/', TransactionSummaryView.as_view(), name='user-transactions-summary'),
     path('subscribe/', SubscribersListView.as_view(), name='subscribe'),
     path('unsubscribe/', UnSubscribeView.as_view(), name='unsubscribe'),
     path('user/contacts/', UserContactsView.as_view(), name='user-contacts'),
     path('user/messages/', UserMessagesView.as_view(), name='user-messages'),
+    path('user/conversations/', ConversationListView.as_view(), name='user-conversations'),
     path('', include(router.urls)),
 ]
@@ -2,10 +2,21 @@ from rest_framework import generics, status, viewsets
 from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, ValidationError
-from .models import CustomUser, Notification, Transaction, Subscriber, Message
+from .models import CustomUser, Notification, Transaction, TransactionRollup, Subscriber, Message, Conversation
 from Projects.models import Project
-from .serializers import CreateUserSerializer, CustomUserSerializer, NotificationSerializer, TransactionSerializer, SubscriberSerializer, MessageSerializer
+from .serializers import CreateUserSerializer, CustomUserSerializer, NotificationSerializer, TransactionSerializer, SubscriberSerializer, MessageSerializer, ConversationSerializer, TransactionRollupSerializer
 from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from api.pagination import IdWindowPagination, KeysetPagination
+from api.conditional import ConditionalRequestMixin
+from api.fieldsets import SparseFieldsetViewMixin
+from api.renderers import StreamingJSONMixin
+from .outbox import queue_notification
+from .counters import adjust_unread, unread_count
+from .conversations import mark_conversation_read
+from .sync import notification_delta
+from .ledger import ledger_balance
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -19,13 +30,12 @@ class CreateUserView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         
-        notification = Notification.objects.create(
+        queue_notification(
             user=user,
             type="welcome",
             url=f"/dashboard/profile/{user.id}?username={user.first_name}+{user.last_name}&title={user.user_title}",
             message="Welcome to Forge! Get started by creating a project.",
         )
-        notification.save()
 
         email = self.request.data['email']
         subscriber = Subscriber.objects.create(email=email)
@@ -50,22 +60,64 @@ class UserRetrieveUsernameWithEmailView(generics.GenericAPIView):
         except CustomUser.DoesNotExist:
             return Response({'detail': 'User not found'}, status=404)  # Return a 404 if not found
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+
+def user_validators(user_id):
+    try:
+        row = CustomUser.objects.filter(pk=user_id).values_list('updated_at', flat=True).first()
+    except (TypeError, ValueError):
+        return None  # Malformed id; the view itself answers with a 404
+    return ConditionalRequestMixin.make_validators(row)
+
+
+def loaded_user_validators(user):
+    if 'updated_at' in user.get_deferred_fields():
+        return None  # Deferred by a sparse fieldset; reading it would cost a query anyway
+    return ConditionalRequestMixin.make_validators(user.updated_at)
+
+
+class UserViewSet(StreamingJSONMixin, ConditionalRequestMixin, SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    use_replica = True  # GETs read from a replica (see api/routers.py)
+
+    def get_validators(self):
+        return user_validators(self.kwargs['pk'])
 
+    def object_validators(self, user):
+        return loaded_user_validators(user)
 
-class CurrentUserViewSet(viewsets.ViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+
+class CurrentUserViewSet(ConditionalRequestMixin, viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
+    def get_validators(self):
+        return user_validators(self.request.user.pk)
+
+    def object_validators(self, user):
+        return loaded_user_validators(user)
+
     def retrieve(self, request):
-        user = request.user
+        return self.conditional_response(request, self._retrieve)
+
+    def update(self, request):
+        return self.conditional_response(request, self._update)
+
+    def get_user(self):
+        # request.user only carries the slim cached columns; the profile needs the full row
+        self.loaded_object = get_object_or_404(CustomUser, pk=self.request.user.pk)
+        return self.loaded_object
+
+    def _retrieve(self, request):
+        user = self.get_user()
         serializer = CustomUserSerializer(user)
         return Response(serializer.data)
 
-    def update(self, request):
-        user = request.user
+    def _update(self, request):
+        user = self.get_user()
         serializer = CustomUserSerializer(
             user, data=request.data, partial=True)
         if serializer.is_valid():
@@ -78,13 +130,21 @@ class CurrentUserViewSet(viewsets.ViewSet):
         user.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class NotificationsList(generics.ListAPIView):
+class NotificationsList(StreamingJSONMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    trust_token_claims = True  # Only uses request.user.id
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user.id
         return Notification.objects.filter(user=user, is_read=False)
+
+    def list(self, request, *args, **kwargs):
+        # ?since=<cursor> switches to delta mode (see Users/sync.py)
+        if 'since' in request.query_params:
+            return Response(notification_delta(request.user.id, request.query_params['since'], self.get_serializer_class()))
+        return super().list(request, *args, **kwargs)
     
 class MarkNotificationAsRead(generics.UpdateAPIView):
     serializer_class = NotificationSerializer
@@ -93,11 +153,41 @@ class MarkNotificationAsRead(generics.UpdateAPIView):
     def get_queryset(self):
         user = self.request.user.id
         return Notification.objects.filter(user=user, is_read=False)
+
+
+class NotificationCountView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    trust_token_claims = True  # Only uses request.user.id
+
+    def get(self, request):
+        return Response({'unread': unread_count(request.user.id)})
+
+
+class MarkNotificationsReadView(generics.GenericAPIView):
+    """Mark ``{"ids": [...]}`` or ``{"all": true}`` of the user's notifications read in one UPDATE."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        notifications = Notification.objects.filter(user=request.user.id, is_read=False)
+        ids = request.data.get('ids')
+
+        if request.data.get('all') is True:
+            pass
+        elif isinstance(ids, list) and ids and all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            notifications = notifications.filter(id__in=ids)
+        else:
+            raise ValidationError({'error': 'Provide a non-empty list of notification "ids" or "all": true.'})
+
+        updated = notifications.update(is_read=True, read_at=timezone.now())
+        adjust_unread(request.user.id, -updated)
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
     
 
-class TransactionList(generics.ListAPIView):
+class TransactionList(StreamingJSONMixin, generics.ListAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    trust_token_claims = True  # Only uses request.user.id
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user.id
@@ -111,6 +201,30 @@ class TransactionList(generics.ListAPIView):
             return Transaction.objects.filter(user=user)
 
 
+class TransactionSummaryView(generics.GenericAPIView):
+    """Ledger balances and per-month totals, served from checkpoints and rollup rows."""
+    permission_classes = [IsAuthenticated]
+    trust_token_claims = True  # Only uses request.user.id
+    max_months = 120
+
+    def get(self, request):
+        user = request.user.id
+        try:
+            months = min(int(request.query_params.get('months', 12)), self.max_months)
+        except ValueError:
+            raise ValidationError({'error': 'months must be an integer.'})
+
+        rollups = TransactionRollup.objects.filter(user=user)
+        currency = request.query_params.get('currency')
+        if currency:
+            rollups = rollups.filter(currency=currency)
+
+        return Response({
+            'balances': {currency: ledger_balance(user, currency) for currency in Transaction.BALANCE_COLUMNS},
+            'months': TransactionRollupSerializer(rollups.order_by('-month', 'currency')[:months], many=True).data,
+        })
+
+
 class SubscribersListView(generics.ListCreateAPIView):
     queryset = Subscriber.objects.all()
     serializer_class = SubscriberSerializer
@@ -146,7 +260,7 @@ class UnSubscribeView(generics.DestroyAPIView):
 
 
 
-class UserContactsView(generics.ListAPIView):
+class UserContactsView(StreamingJSONMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = CustomUserSerializer
     permission_classes = [IsAuthenticated]
 
@@ -167,12 +281,41 @@ class UserContactsView(generics.ListAPIView):
         
         return queryset
 
-class UserMessagesView(generics.ListCreateAPIView):
+class UserMessagesView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = IdWindowPagination
 
     def get_queryset(self):
         user = self.request.user
         other_user = self.request.query_params.get('other_user')
 
-        return Message.objects.filter(sender=user, receiver=other_user) | Message.objects.filter(sender=other_user, receiver=user)
\ No newline at end of file
+        return Message.objects.filter(Q(sender=user, receiver=other_user) | Q(sender=other_user, receiver=user))
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # Reading the thread clears the user's unread count in the inbox
+        other_user = request.query_params.get('other_user')
+        if other_user and other_user.isdigit():
+            mark_conversation_read(request.user.id, int(other_user))
+        return response
+
+
+class ConversationPagination(KeysetPagination):
+    ordering_field = 'last_message_at'
+
+
+class ConversationListView(generics.ListAPIView):
+    """The user's inbox: one row per conversation, most recent first."""
+    serializer_class = ConversationSerializer
+    permission_classes = [IsAuthenticated]
+    trust_token_claims = True  # Only uses request.user.id
+    pagination_class = ConversationPagination
+
+    def get_queryset(self):
+        user = self.request.user.id
+        return (
+            Conversation.objects.filter(Q(user_a=user) | Q(user_b=user))
+            .select_related('user_a', 'user_b')
+            .order_by('-last_message_at', '-id')
+        )
\ No newline at end of file
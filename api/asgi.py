@@ -2,6 +2,8 @@
 ASGI config for api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the app through it (e.g. ``uvicorn api.asgi:application``) for the
+Server-Sent Events stream at /api/events/.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -14,3 +16,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
 
 application = get_asgi_application()
+
+# Write notifications left in the outbox by a crash or restart (NOTIFICATION_OUTBOX MODE 'thread')
+from Users.outbox import start_worker  # noqa: E402
+start_worker()
@@ -0,0 +1,135 @@
+import hmac
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .caches import cache_is_shared
+from .metrics import count_cache_lookup, metrics_settings
+
+
+# Columns kept in the cached user. Everything else (profile JSON, balances, ...) is
+# deferred and loaded from the database on first access, so it is never stale.
+SLIM_USER_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser')
+
+
+def auth_cache_settings():
+    options = {'ENABLED': 'auto', 'TIMEOUT': 60}
+    options.update(getattr(settings, 'AUTH_USER_CACHE', {}))
+    return options
+
+
+def auth_cache_enabled():
+    """
+    Whether slim users are cached. 'auto' only caches with a shared cache
+    backend: with a per-process one, deactivating a user only drops the entry of
+    the worker that saved it, and the others keep accepting the old row until
+    the entry expires.
+    """
+    enabled = auth_cache_settings()['ENABLED']
+    if enabled == 'auto':
+        return cache_is_shared()
+    return enabled in (True, 'True')
+
+
+def cached_user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """Forget a cached user now and again after commit, so a concurrent request cannot re-cache the old row."""
+    key = cached_user_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves the user from a short-lived cache of its
+    slim columns instead of selecting the whole ``CustomUser`` row per request.
+    Entries are dropped whenever the user is saved or deleted (see Users/signals.py).
+    Without a shared cache backend the slim columns are selected on every request.
+
+    Safe-method requests to views that set ``trust_token_claims = True`` skip the
+    user lookup entirely and get a ``TokenUser`` built from the token claims. Such
+    views may only use ``request.user.id``; a deactivated user keeps access to them
+    until the token expires.
+    """
+
+    def authenticate(self, request):
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        if request.method in SAFE_METHODS and getattr(view, 'trust_token_claims', False):
+            header = self.get_header(request)
+            if header is None:
+                return None
+            raw_token = self.get_raw_token(header)
+            if raw_token is None:
+                return None
+            validated_token = self.get_validated_token(raw_token)
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken(_('Token contained no recognizable user identification'))
+            # simplejwt issues the claim as a string; callers compare request.user.id with integer pks
+            try:
+                validated_token[api_settings.USER_ID_CLAIM] = self.user_model._meta.pk.to_python(
+                    validated_token[api_settings.USER_ID_CLAIM]
+                )
+            except ValidationError:
+                raise InvalidToken(_('Token contained no recognizable user identification'))
+            return api_settings.TOKEN_USER_CLASS(validated_token), validated_token
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the password hash, which is not cached
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        # from_db() expects the values in model field order
+        fields = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in SLIM_USER_FIELDS]
+        caching = auth_cache_enabled()
+        key = cached_user_key(user_id)
+        values = cache.get(key) if caching else None
+        if caching:
+            count_cache_lookup('auth_user', hit=values is not None)
+        if values is None:
+            values = (
+                self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values_list(*fields)
+                .first()
+            )
+            if values is None:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            if caching:
+                cache.set(key, values, auth_cache_settings()['TIMEOUT'])
+
+        # A regular model instance with the remaining fields deferred
+        user = self.user_model.from_db(router.db_for_read(self.user_model), fields, values)
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """Accepts ``Authorization: Bearer <METRICS['TOKEN']>`` for the metrics scraper; other credentials fall through."""
+
+    def authenticate(self, request):
+        token = metrics_settings()['TOKEN']
+        parts = get_authorization_header(request).split()
+        if not token or len(parts) != 2 or parts[0].lower() != b'bearer':
+            return None
+        if not hmac.compare_digest(parts[1], token.encode()):
+            return None
+        return AnonymousUser(), 'metrics'
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="metrics"'
@@ -0,0 +1,21 @@
+"""
+Properties of the configured cache backends.
+
+Features that coordinate worker processes through the cache (the project list
+catalog version, read-your-writes pins) only work when every worker sees the
+same entries, i.e. with a shared backend such as Redis, Memcached, the
+database or a file-based cache on a shared directory.
+"""
+from django.conf import settings
+
+
+# Backends whose entries are only seen by the process that wrote them
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    """Whether every worker process sees the same entries in cache ``alias``."""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
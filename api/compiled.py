@@ -0,0 +1,189 @@
+"""
+Compiled read-only serializers for hot list endpoints.
+
+``compile_serializer`` turns the declared fields of a ``ModelSerializer`` into
+a plan: the ``values()`` columns to select (related ones through the same JOINs
+``select_related`` would use, e.g. ``owner__username``) and one prebuilt
+accessor per output field that reads the row dict and converts the value the
+way the DRF field would. Rows are then mapped straight to dicts, skipping model
+instantiation and the per-field ``get_attribute`` / ``to_representation``
+dispatch. The output is identical to ``serializer.data``.
+
+Serializers with anything the compiler cannot express (``SerializerMethodField``,
+``source='*'``, many-to-many, files, properties, a custom ``to_representation``)
+are not compiled and ``CompiledListMixin`` falls back to the regular path.
+"""
+import copy
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+from .pagination import ordering_fields
+from .timing import timed
+
+
+# Fields whose to_representation() returns the database value unchanged
+IDENTITY_FIELDS = (
+    serializers.ReadOnlyField, serializers.CharField, serializers.IntegerField,
+    serializers.BooleanField, serializers.JSONField, serializers.ChoiceField,
+)
+# Fields whose to_representation() only depends on the value and the field's own options
+CONVERTED_FIELDS = (
+    serializers.DateTimeField, serializers.DateField, serializers.TimeField,
+    serializers.DecimalField, serializers.FloatField, serializers.UUIDField,
+)
+
+# Plans kept per process, least recently used first; ?fields= / ?omit= subsets are client-chosen
+COMPILED_CACHE_SIZE = 256
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+class CompiledSerializer:
+
+    def __init__(self, paths, accessors):
+        self.paths = paths
+        self.accessors = accessors
+
+    def to_representation(self, row):
+        return {name: get(row) for name, get in self.accessors}
+
+    def many(self, rows):
+        accessors = self.accessors
+        return [{name: get(row) for name, get in accessors} for row in rows]
+
+
+def column(key, convert=None):
+    if convert is None:
+        return itemgetter(key)
+
+    def get(row):
+        value = row[key]
+        return None if value is None else convert(value)
+    return get
+
+
+def nested(compiled, null_key):
+    def get(row):
+        # A missing related row comes back as all-NULL columns
+        return None if row[null_key] is None else compiled.to_representation(row)
+    return get
+
+
+def resolve(model, attrs):
+    """The model field at the end of ``attrs``, or None if the path is not plain columns."""
+    field = None
+    for index, attr in enumerate(attrs):
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if field.many_to_many or field.one_to_many:
+            return None
+        if index < len(attrs) - 1 and getattr(field, 'null', False):
+            # DRF skips the key when an intermediate relation is None
+            return None
+        model = field.related_model
+    return field
+
+
+def build_plan(serializer, prefix=''):
+    """``(paths, accessors)`` for ``serializer``, or None if it cannot be compiled."""
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+    model = serializer.Meta.model
+    paths, accessors = [], []
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or isinstance(field, serializers.SerializerMethodField):
+            return None
+        target = resolve(model, field.source_attrs)
+        if target is None:
+            return None
+        key = prefix + '__'.join(field.source_attrs)
+
+        if isinstance(field, serializers.ModelSerializer):
+            if target.related_model is not field.Meta.model:
+                return None
+            plan = build_plan(field, prefix=f'{key}__')
+            if plan is None:
+                return None
+            null_key = f'{key}__{field.Meta.model._meta.pk.name}'
+            paths += [*plan[0], null_key]
+            accessors.append((name, nested(CompiledSerializer(*plan), null_key)))
+        elif isinstance(field, serializers.BaseSerializer):
+            return None  # Lists of nested serializers
+        elif type(field) is serializers.PrimaryKeyRelatedField:
+            if field.pk_field is not None or not target.is_relation:
+                return None
+            paths.append(key)
+            accessors.append((name, column(key)))
+        elif target.is_relation:
+            return None  # A whole related object or a hyperlink
+        elif type(field) in IDENTITY_FIELDS:
+            paths.append(key)
+            accessors.append((name, column(key)))
+        elif type(field) in CONVERTED_FIELDS:
+            paths.append(key)
+            # An unbound copy: the bound field's parent carries the request in its context
+            accessors.append((name, column(key, copy.deepcopy(field).to_representation)))
+        else:
+            return None
+    return paths, accessors
+
+
+def compile_serializer(serializer):
+    """
+    A ``CompiledSerializer`` for a (possibly sparse) serializer instance, or None.
+
+    Plans are cached per serializer class and selected fields, up to
+    ``COMPILED_CACHE_SIZE`` of them; the converters they hold are unbound copies
+    of the fields, so a cached plan never keeps a serializer or request alive.
+    """
+    key = (type(serializer), tuple(serializer.fields))
+    with _compiled_lock:
+        if key in _compiled:
+            _compiled.move_to_end(key)
+            return _compiled[key]
+
+    plan = build_plan(serializer)
+    compiled = None if plan is None else CompiledSerializer(list(dict.fromkeys(plan[0])), plan[1])
+    with _compiled_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > COMPILED_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+class CompiledListMixin:
+    """
+    Serve ``list()`` from ``values()`` rows through the compiled serializer.
+
+    Filtering, ordering and pagination run unchanged on the values queryset;
+    the columns the paginator reads are selected alongside the serialized ones.
+    Unpaginated rows go to ``StreamingJSONMixin`` when the view has it.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer())
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = dict.fromkeys([*compiled.paths, 'id', *ordering_fields(self.paginator)])
+        rows = queryset.values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is None and hasattr(self, 'unpaginated_response'):
+            return self.unpaginated_response(rows, compiled.many)
+        with timed('serialize'):
+            data = compiled.many(rows if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
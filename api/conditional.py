@@ -0,0 +1,80 @@
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .fieldsets import parse_fieldset
+
+CONDITIONAL_HEADERS = ('If-Match', 'If-None-Match', 'If-Modified-Since', 'If-Unmodified-Since')
+
+
+class ConditionalRequestMixin:
+    """
+    ETag / Last-Modified support for detail endpoints.
+
+    Views implement ``get_validators()`` returning ``(etag, last_modified)``
+    from a cheap query on the row's ``updated_at`` columns, or ``None`` when
+    the object does not exist. ``If-None-Match`` / ``If-Modified-Since``
+    requests that still match get a 304 and ``If-Match`` writes that no
+    longer match get a 412, both before any serializer work is done.
+
+    The ETag also covers the representation: the ``?fields=`` / ``?omit=``
+    selection and the negotiated media type, so a sparse or browsable response
+    never validates a request for another representation.
+
+    Reads without conditional headers skip that query: their validators come
+    from ``object_validators()`` on the object the handler loaded through
+    ``get_object()``, falling back to ``get_validators()`` when it returns
+    ``None`` (e.g. the timestamps were deferred by a sparse fieldset).
+    """
+    loaded_object = None
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def object_validators(self, obj):
+        return None
+
+    def get_object(self):
+        self.loaded_object = super().get_object()
+        return self.loaded_object
+
+    @staticmethod
+    def make_validators(*timestamps):
+        timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+        if not timestamps:
+            return None
+        digest = hashlib.md5('|'.join(timestamp.isoformat() for timestamp in timestamps).encode()).hexdigest()
+        return f'"{digest}"', max(timestamps)
+
+    @staticmethod
+    def representation_etag(request, etag):
+        fields, omit = parse_fieldset(request)
+        variant = '|'.join([
+            etag, ','.join(sorted(fields or ())), ','.join(sorted(omit)), getattr(request, 'accepted_media_type', None) or '',
+        ])
+        return f'"{hashlib.md5(variant.encode()).hexdigest()}"'
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        conditional = any(header in request.headers for header in CONDITIONAL_HEADERS)
+        validators = self.get_validators() if conditional else None
+        if validators is not None:
+            etag, last_modified = validators
+            response = get_conditional_response(
+                request, etag=self.representation_etag(request, etag), last_modified=int(last_modified.timestamp())
+            )
+            if response is not None:
+                return response
+
+        response = handler(request, *args, **kwargs)
+
+        # Recompute after writes so clients can chain If-Match updates
+        if response.status_code == 200:
+            if request.method not in ('GET', 'HEAD'):
+                validators = self.get_validators()
+            elif not conditional:
+                loaded = self.loaded_object
+                validators = (loaded is not None and self.object_validators(loaded)) or self.get_validators()
+            if validators is not None:
+                etag, last_modified = validators
+                response['ETag'] = self.representation_etag(request, etag)
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
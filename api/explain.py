@@ -0,0 +1,86 @@
+"""
+EXPLAIN helpers for the ``explain_queries`` index advisor.
+
+Plans are read with ``EXPLAIN QUERY PLAN`` on SQLite and ``EXPLAIN`` on
+PostgreSQL and checked for the two shapes that hurt on large tables: full table
+scans and sorts that cannot use an index (SQLite's "USE TEMP B-TREE", a
+PostgreSQL Sort node). For a flagged table, the columns the query compares by
+equality and orders by are turned into a candidate composite index.
+"""
+import re
+from django.apps import apps
+
+
+def explain(conn, sql):
+    """Plan lines for ``sql`` (as executed, parameters inlined), or None on other backends."""
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+        if conn.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+    return None
+
+
+def plan_problems(vendor, plan, sql):
+    """
+    ``(kind, table)`` for each full scan ('scan') or index-less sort ('sort') in ``plan``.
+
+    Sorts are attributed to the query's main table, scans of subqueries and
+    other non-model relations are ignored.
+    """
+    main = re.search(r' FROM "(\w+)"', sql)
+    main = main.group(1) if main else None
+    problems = []
+    for line in plan:
+        line = line.strip()
+        if vendor == 'sqlite':
+            scan = re.match(r'SCAN (?:TABLE )?"?(\w+)"?(.*)', line)
+            if scan and 'USING' not in scan.group(2) and 'VIRTUAL TABLE' not in scan.group(2):
+                problems.append(('scan', scan.group(1)))
+            elif 'USE TEMP B-TREE' in line:
+                problems.append(('sort', main))
+        elif vendor == 'postgresql':
+            scan = re.search(r'Seq Scan on "?(\w+)"?', line)
+            if scan:
+                problems.append(('scan', scan.group(1)))
+            elif re.match(r'(->\s+)?Sort\b', line):
+                problems.append(('sort', main))
+    return [(kind, table) for kind, table in problems if table is None or model_for_table(table) is not None]
+
+
+def normalize(sql):
+    """``sql`` with its literals replaced, so repeated query shapes are explained once."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    return re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+
+
+def model_for_table(table):
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def suggest_index(sql, table):
+    """A ``models.Index`` declaration for ``table`` from the query's filters and ordering, or None."""
+    model = model_for_table(table) if table else None
+    if model is None or model.__module__.startswith('django.'):
+        return None  # Unknown or framework tables
+    column = rf'"{re.escape(table)}"\."(\w+)"'
+    where, _, order = sql.partition(' ORDER BY ')
+    # Comparisons with values, not join conditions against another column
+    equal = re.findall(column + r'\s*(?:=\s*(?!")|IN \(|IS NULL)', where.partition(' WHERE ')[2])
+    ordering = [
+        ('-' if direction.strip() == 'DESC' else '') + name
+        for name, direction in re.findall(column + r'( DESC| ASC)?', order)
+    ]
+    fields = list(dict.fromkeys(equal + [name for name in ordering if name.lstrip('-') not in equal]))
+    if not fields:
+        return None
+
+    # Report model field names rather than columns ("owner" for "owner_id")
+    columns = {field.column: field.name for field in model._meta.concrete_fields}
+    names = [('-' if name.startswith('-') else '') + columns.get(name.lstrip('-'), name.lstrip('-')) for name in fields]
+    return f'{model._meta.label}: models.Index(fields={names!r})'
@@ -0,0 +1,112 @@
+"""
+Sparse fieldsets: ``?fields=id,title`` keeps only the listed fields of a
+response and ``?omit=description`` drops some. Only read requests are affected,
+and only the top-level serializer (nested ones keep all their fields).
+
+``SparseFieldsetSerializerMixin`` trims the serializer output;
+``SparseFieldsetViewMixin`` pushes the selection down into the queryset as
+``.defer()`` so the unrequested columns are never read, including those of
+``select_related`` relations.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from .pagination import ordering_fields
+
+
+def parse_fieldset(request):
+    """``(fields, omit)`` requested by ``request``; ``fields`` is None when not restricted."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    params = request.query_params
+    fields = {name.strip() for name in params.get('fields', '').split(',') if name.strip()} or None
+    omit = {name.strip() for name in params.get('omit', '').split(',') if name.strip()}
+    return fields, omit
+
+
+class SparseFieldsetSerializerMixin:
+
+    def is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, omit = parse_fieldset(self.context.get('request'))
+        if (requested is None and not omit) or not self.is_top_level():
+            return fields
+
+        unknown = ((requested or set()) | omit) - set(fields)
+        if unknown:
+            raise ValidationError({'error': f'Unknown fields: {", ".join(sorted(unknown))}'})
+        return {
+            name: field for name, field in fields.items()
+            if (requested is None or name in requested) and name not in omit
+        }
+
+
+def field_paths(serializer):
+    """Model attribute paths read by the serializer's fields, or None if they cannot be known."""
+    paths = []
+    for field in serializer.fields.values():
+        if field.source == '*':
+            return None
+        path = tuple(field.source.split('.'))
+        if isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization():
+            # PrimaryKeyRelatedField only reads the local "<name>_id" column
+            path = (path[0], 'pk')
+        paths.append(path)
+    return paths
+
+
+def deferrable_columns(model, paths, select_related, annotations=(), prefix=''):
+    """Concrete columns of ``model`` (and of its select_related relations) that no path reads."""
+    fields = {field.name: field for field in model._meta.get_fields()}
+    needed = set()
+    for path in paths:
+        root = path[0]
+        if root not in fields and root not in annotations and root != 'pk':
+            # A property or method: its column dependencies are unknown
+            return None
+        needed.add(root)
+
+    deferred = [
+        f'{prefix}{field.name}' for field in model._meta.concrete_fields
+        if not field.primary_key and not field.is_relation and field.name not in needed
+    ]
+
+    if isinstance(select_related, dict):
+        for name, nested in select_related.items():
+            if name not in needed:
+                continue
+            # Its pk is never deferred, so reading only the pk needs nothing more
+            nested_paths = [path[1:] for path in paths if path[0] == name and path[1:] != ('pk',)]
+            if any(not path for path in nested_paths):
+                continue  # The whole related object is serialized
+            related = deferrable_columns(fields[name].related_model, nested_paths, nested, prefix=f'{prefix}{name}__')
+            if related is None:
+                continue
+            deferred += related
+    return deferred
+
+
+class SparseFieldsetViewMixin:
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        requested, omit = parse_fieldset(self.request)
+        if requested is None and not omit:
+            return queryset
+
+        paths = field_paths(self.get_serializer())
+        if paths is None:
+            return queryset
+        # Keep the columns the paginator orders by
+        paths += [(name,) for name in ordering_fields(self.paginator)]
+
+        deferred = deferrable_columns(
+            queryset.model, paths, queryset.query.select_related, queryset.query.annotations
+        )
+        return queryset.defer(*deferred) if deferred else queryset
@@ -0,0 +1,392 @@
+"""
+In-process metrics with a Prometheus scrape endpoint.
+
+``inc()`` and ``observe()`` update counters and histograms in a per-process
+registry (a dict update under a lock). ``MetricsMiddleware`` records request
+latency, request/response sizes and query counts per view; caches and business
+code (bids, sparks, notifications) call ``inc()`` directly.
+
+Gunicorn runs several worker processes, each with its own registry. When
+``METRICS['DIR']`` is set, every process writes its totals to
+``<pid>-<start time>.json`` in that directory at most every ``FLUSH_INTERVAL``
+seconds (and at exit), and a scrape sums the files of all processes. A scrape
+also folds the files of exited workers into ``total.json`` and removes them, so
+the counters never go backwards and the directory does not grow as workers are
+recycled; a worker that reuses a dead worker's pid writes a file of its own.
+The directory must only be shared by the processes of one host. Without a
+directory, or when it cannot be written, a scrape only sees the process that
+serves it.
+
+``GET /metrics/`` (``api.views.MetricsView``) returns the text exposition
+format. It needs ``Authorization: Bearer <METRICS['TOKEN']>`` (for the
+Prometheus scraper) or a staff user.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from pathlib import Path
+from django.conf import settings
+from .timing import current_timing
+
+
+logger = logging.getLogger(__name__)
+
+Metric = namedtuple('Metric', ['kind', 'help', 'buckets'], defaults=[None])
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)  # Bytes
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+METRICS = {
+    'http_requests_total': Metric('counter', 'Requests by view, method and status class.'),
+    'http_request_duration_seconds': Metric('histogram', 'Request latency by view.', LATENCY_BUCKETS),
+    'http_request_size_bytes': Metric('histogram', 'Request body size by view.', SIZE_BUCKETS),
+    'http_response_size_bytes': Metric('histogram', 'Response body size by view (streamed bodies excluded).', SIZE_BUCKETS),
+    'db_queries_total': Metric('counter', 'SQL queries by view.'),
+    'db_query_seconds_total': Metric('counter', 'Time spent in SQL by view.'),
+    'db_queries_per_request': Metric('histogram', 'SQL queries per request by view.', QUERY_BUCKETS),
+    'cache_requests_total': Metric('counter', 'Cache lookups by cache and result (hit or miss).'),
+    'bids_placed_total': Metric('counter', 'Bids placed.'),
+    'sparks_spent_total': Metric('counter', 'Sparks paid out of user balances.'),
+    'notifications_queued_total': Metric('counter', 'Notifications queued by type.'),
+}
+
+PREFIX = 'forge_'
+
+TOTAL_FILE = 'total.json'  # Totals of exited processes
+FOLD_LOCK = 'fold.lock'
+FOLD_LOCK_TIMEOUT = 60  # Seconds after which the lock of a scrape that died is broken
+FOLDED_KEEP = 3600  # Seconds a folded file is remembered, for scrapes that read it before it was removed
+
+
+def metrics_settings():
+    options = {
+        'ENABLED': True,
+        'DIR': '',
+        'FLUSH_INTERVAL': 5.0,
+        'TOKEN': '',
+    }
+    options.update(getattr(settings, 'METRICS', {}))
+    return options
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.pid = os.getpid()
+            self.started = time.time_ns()
+            self.counters = {}
+            self.histograms = {}  # key -> [count per bucket..., count above the last bucket, sum]
+            self.flushed_at = time.monotonic()
+
+    def check_fork(self):
+        # A forked worker starts from its own zeroes, not from the master's totals
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.started = time.time_ns()
+            self.counters, self.histograms = {}, {}
+
+    @property
+    def filename(self):
+        return f'{self.pid}-{self.started}.json'
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.check_fork()
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name].buckets
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.check_fork()
+            row = self.histograms.get(key)
+            if row is None:
+                row = self.histograms[key] = [0] * (len(buckets) + 2)
+            row[bisect_left(buckets, value)] += 1
+            row[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            self.check_fork()
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, labels, list(row)] for (name, labels), row in self.histograms.items()],
+            }
+
+    def flush(self, force=False):
+        """Write this process's totals to the shared directory, if one is configured."""
+        options = metrics_settings()
+        if not options['DIR']:
+            return
+        with self.lock:
+            # Only one thread per interval gets past here
+            if not force and time.monotonic() - self.flushed_at < options['FLUSH_INTERVAL']:
+                return
+            self.flushed_at = time.monotonic()
+
+        directory = Path(options['DIR'])
+        directory.mkdir(parents=True, exist_ok=True)
+        snapshot = self.snapshot()  # Before the file name: a forked worker gets its own
+        write_json(directory / self.filename, snapshot)
+
+    def collect(self):
+        """Totals over every process: the shared directory when configured, this process otherwise."""
+        directory = metrics_settings()['DIR']
+        if not directory:
+            return merge([self.snapshot()])
+        try:
+            self.flush(force=True)
+        except OSError:
+            # E.g. a read-only filesystem: serve this process's totals rather than failing the scrape
+            logger.exception('Could not write the metrics of this process to %s', directory)
+            return merge([self.snapshot()])
+        fold_exited(Path(directory), current=self.filename)
+        return merge(read_snapshots(Path(directory)))
+
+
+def merge(snapshots):
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, row in snapshot['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            total = histograms.get(key)
+            histograms[key] = row if total is None else [a + b for a, b in zip(total, row)]
+    return counters, histograms
+
+
+def write_json(path, data):
+    # A private temporary file per write, renamed into place so readers never see a partial file
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=f'{os.getpid()}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def read_total(directory):
+    try:
+        return json.loads((directory / TOTAL_FILE).read_text())
+    except FileNotFoundError:
+        return {'counters': [], 'histograms': [], 'folded': {}}
+
+
+def process_files(directory):
+    """``{path: (pid, start time)}`` of the per-process files in ``directory``."""
+    files = {}
+    for path in directory.glob('*-*.json'):
+        pid, _, started = path.stem.partition('-')
+        if pid.isdigit() and started.isdigit():
+            files[path] = (int(pid), int(started))
+    return files
+
+
+def process_alive(pid):
+    if os.name != 'posix':
+        return True  # os.kill(pid, 0) does not just probe on Windows; rely on pid reuse by our own workers
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by another user
+    return True
+
+
+def read_snapshots(directory):
+    snapshots = {}
+    for path in process_files(directory):
+        try:
+            snapshots[path.name] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # Removed or replaced while reading
+    # Read the total last: a file folded while the others were read is listed in it
+    try:
+        total = read_total(directory)
+    except (OSError, ValueError):
+        logger.exception('Could not read the metrics of exited processes from %s', directory)
+        total = {'counters': [], 'histograms': [], 'folded': {}}
+    for name in total['folded']:
+        snapshots.pop(name, None)
+    return [total, *snapshots.values()]
+
+
+def fold_exited(directory, current):
+    """Add the files of exited processes to ``total.json`` and remove them."""
+    files = process_files(directory)
+    latest = {}
+    for pid, started in files.values():
+        latest[pid] = max(started, latest.get(pid, 0))
+    # A file is stale once its pid has exited or been reused by a newer worker
+    exited = [
+        path for path, (pid, started) in files.items()
+        if path.name != current and (started < latest[pid] or not process_alive(pid))
+    ]
+    if not exited:
+        return
+
+    lock = directory / FOLD_LOCK
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        # Another scrape is folding; break the lock of one that died
+        try:
+            if time.time() - lock.stat().st_mtime > FOLD_LOCK_TIMEOUT:
+                lock.unlink()
+        except OSError:
+            pass
+        return
+    except OSError:
+        logger.exception('Could not fold the metrics of exited processes in %s', directory)
+        return
+
+    try:
+        total = read_total(directory)
+        folded = total['folded']
+        now = time.time()
+        snapshots = [total]
+        for path in exited:
+            if path.name in folded:
+                continue  # Folded by a scrape that died before removing it
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+            folded[path.name] = now
+        counters, histograms = merge(snapshots)
+        write_json(directory / TOTAL_FILE, {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, row] for (name, labels), row in histograms.items()],
+            'folded': {
+                name: at for name, at in folded.items()
+                if now - at < FOLDED_KEEP or (directory / name).exists()
+            },
+        })
+        for path in exited:
+            path.unlink(missing_ok=True)
+    except (OSError, ValueError):
+        logger.exception('Could not fold the metrics of exited processes in %s', directory)
+    finally:
+        lock.unlink(missing_ok=True)
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+
+
+@atexit.register
+def flush_at_exit():
+    try:
+        registry.flush(force=True)
+    except OSError:
+        logger.exception('Could not write the metrics of this process to %s', metrics_settings()['DIR'])
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels) + '}'
+
+
+def format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def exposition(counters, histograms):
+    """Render merged totals in the Prometheus text format."""
+    lines = []
+    for name, metric in METRICS.items():
+        full_name = PREFIX + name
+        lines.append(f'# HELP {full_name} {metric.help}')
+        lines.append(f'# TYPE {full_name} {metric.kind}')
+        if metric.kind == 'counter':
+            for (key_name, labels), value in sorted(counters.items()):
+                if key_name == name:
+                    lines.append(f'{full_name}{format_labels(labels)} {format_number(value)}')
+            continue
+
+        for (key_name, labels), row in sorted(histograms.items()):
+            if key_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric.buckets, '+Inf'], row[:-1]):
+                cumulative += count
+                lines.append(f'{full_name}_bucket{format_labels((*labels, ("le", bound)))} {cumulative}')
+            lines.append(f'{full_name}_sum{format_labels(labels)} {format_number(row[-1])}')
+            lines.append(f'{full_name}_count{format_labels(labels)} {cumulative}')
+
+    # Hit ratio since start, for dashboards without PromQL; use rate() on the counter otherwise
+    lookups = {}
+    for (key_name, labels), value in counters.items():
+        if key_name == 'cache_requests_total':
+            labels = dict(labels)
+            totals = lookups.setdefault(labels.get('cache', ''), {'hit': 0, 'miss': 0})
+            totals[labels.get('result')] = totals.get(labels.get('result'), 0) + value
+    lines.append(f'# HELP {PREFIX}cache_hit_ratio Cache hits over lookups since the counters started.')
+    lines.append(f'# TYPE {PREFIX}cache_hit_ratio gauge')
+    for cache_name, totals in sorted(lookups.items()):
+        total = totals['hit'] + totals['miss']
+        lines.append(f'{PREFIX}cache_hit_ratio{format_labels([("cache", cache_name)])} {round(totals["hit"] / total, 4) if total else 0.0}')
+    return '\n'.join(lines) + '\n'
+
+
+def count_cache_lookup(cache_name, hit):
+    inc('cache_requests_total', cache=cache_name, result='hit' if hit else 'miss')
+
+
+class MetricsMiddleware:
+    """Per-view latency, size and query metrics; place it inside ``RequestTimingMiddleware`` for the query counts."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not metrics_settings()['ENABLED']:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+        inc('http_requests_total', view=view, method=request.method, status=f'{response.status_code // 100}xx')
+        observe('http_request_duration_seconds', elapsed, view=view)
+        observe('http_request_size_bytes', int(request.META.get('CONTENT_LENGTH') or 0), view=view)
+        if not response.streaming:
+            observe('http_response_size_bytes', len(response.content), view=view)
+
+        timing = current_timing()
+        if timing is not None:
+            inc('db_queries_total', timing.queries, view=view)
+            inc('db_query_seconds_total', timing.sql_ms / 1000, view=view)
+            observe('db_queries_per_request', timing.queries, view=view)
+
+        try:
+            registry.flush()
+        except OSError:
+            logger.exception('Could not write the metrics of this process to %s', metrics_settings()['DIR'])
+        return response
@@ -0,0 +1,218 @@
+import base64
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def clamp_page_size(request, paginator):
+    try:
+        page_size = int(request.query_params.get(paginator.page_size_query_param, paginator.page_size))
+    except ValueError:
+        return paginator.page_size
+    if page_size <= 0:
+        return paginator.page_size
+    return min(page_size, paginator.max_page_size)
+
+
+def ordering_fields(paginator):
+    """Model fields ``paginator`` orders by and reads back from the page rows."""
+    ordering = getattr(paginator, 'ordering', ())
+    ordering = [ordering] if isinstance(ordering, str) else list(ordering)
+    names = [getattr(paginator, 'rank_field', None), getattr(paginator, 'ordering_field', None), *ordering]
+    return [name.lstrip('-') for name in names if name]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination on (created_at, id), newest first.
+
+    Clients opt in by sending a ``cursor`` query parameter (empty for the first
+    page) and follow the ``next`` link from there. Each page is a single indexed
+    range query, so deep pages cost the same as the first one and no COUNT(*) is
+    run. Without a ``cursor`` parameter the request is handled by
+    ``fallback_class``, or left unpaginated when there is none.
+
+    Lists ranked by an integer annotation (e.g. the number of matched skills)
+    set ``rank_field`` and are paged by (rank, created_at, id), highest rank
+    first. A cursor on any other ordering of its own (search relevance) would
+    lose it, so such requests are rejected with a 400.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    rank_field = None
+    ordering_field = 'created_at'
+    fallback_class = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.fallback = None
+        self.next_position = None
+
+    @property
+    def display_page_controls(self):
+        return bool(self.fallback and self.fallback.display_page_controls)
+
+    def to_html(self):
+        return self.fallback.to_html()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.cursor_query_param not in request.query_params:
+            if self.fallback_class is None:
+                return None
+            return self.paginate_fallback(queryset, request, view)
+
+        if not self.keeps_ordering(queryset):
+            raise ValidationError({'error': 'This list cannot be paginated with a cursor.'})
+
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+
+        queryset = queryset.order_by(*self.keyset_ordering())
+        if position is not None:
+            # Rows after the position: (rank, value, id) < position, compared field by field
+            names = self.position_fields()
+            after = Q()
+            for index, name in enumerate(names):
+                after |= Q(**dict(zip(names[:index], position)), **{f'{name}__lt': position[index]})
+            queryset = queryset.filter(after)
+
+        # Fetch one extra row to know whether there is a next page
+        page = list(queryset[:page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = self.row_position(page[-1])
+        return page
+
+    def paginate_fallback(self, queryset, request, view):
+        self.fallback = self.fallback_class()
+        return self.fallback.paginate_queryset(queryset, request, view)
+
+    def position_fields(self):
+        return [name for name in (self.rank_field, self.ordering_field, 'id') if name]
+
+    def keyset_ordering(self):
+        return tuple(f'-{name}' for name in self.position_fields())
+
+    def keeps_ordering(self, queryset):
+        """Whether the queryset's explicit ordering, if any, is the keyset ordering (or a prefix of it)."""
+        ordering = tuple(str(field) for field in queryset.query.order_by)
+        return ordering == self.keyset_ordering()[:len(ordering)]
+
+    def row_position(self, row):
+        # Rows are model instances, or dicts when paginating a values() queryset
+        if isinstance(row, dict):
+            return tuple(row[name] for name in self.position_fields())
+        return tuple(getattr(row, name) for name in self.position_fields())
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        return clamp_page_size(request, self)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def encode_cursor(self, position):
+        *rank, value, pk = position
+        raw = '|'.join([*(str(part) for part in rank), value.isoformat(), str(pk)])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            *rank, value, pk = raw.split('|')
+            if len(rank) != (1 if self.rank_field else 0):
+                raise ValueError
+            value = parse_datetime(value)
+            if value is None:
+                raise ValueError
+            return (*(int(part) for part in rank), value, int(pk))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class IdWindowPagination(BasePagination):
+    """
+    Windows of a chronological list anchored on a row id, always returned oldest first.
+
+    ``?after_id=`` fetches the rows that came after one the client already has
+    (incremental sync), ``?before_id=`` the rows before it (scrolling back) and
+    no anchor returns the latest window. ``has_more`` tells whether another
+    window exists in that direction.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('created_at', 'id')
+
+    def __init__(self):
+        self.has_more = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = clamp_page_size(request, self)
+        after_id = self.parse_id(request, 'after_id')
+        before_id = self.parse_id(request, 'before_id')
+
+        if after_id is not None:
+            page = list(queryset.filter(id__gt=after_id).order_by(*self.ordering)[:page_size + 1])
+        else:
+            if before_id is not None:
+                queryset = queryset.filter(id__lt=before_id)
+            newest_first = [f'-{field}' for field in self.ordering]
+            page = list(queryset.order_by(*newest_first)[:page_size + 1])
+
+        self.has_more = len(page) > page_size
+        page = page[:page_size]
+        return page if after_id is not None else page[::-1]
+
+    def parse_id(self, request, name):
+        raw = request.query_params.get(name)
+        if not raw:
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValidationError({'error': f'Invalid value for {name}: {raw}'})
+
+    def get_paginated_response(self, data):
+        return Response({
+            'has_more': self.has_more,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'has_more': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
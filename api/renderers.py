@@ -0,0 +1,139 @@
+"""
+JSON rendering through orjson when it is installed, with the stdlib ``json``
+module as the fallback (``FAST_JSON['BACKEND']`` forces either one).
+
+Compact output is byte for byte what DRF's ``JSONRenderer`` produces: values
+orjson does not know natively (datetimes, Decimals, lazy strings, querysets)
+go through DRF's ``JSONEncoder.default``. Indented output (the browsable API,
+``Accept: application/json; indent=4``) is left to DRF.
+
+Views with ``StreamingJSONMixin`` stream unpaginated lists longer than
+``STREAM_THRESHOLD`` items: the rows are read with ``QuerySet.iterator()`` and
+serialized and encoded ``CHUNK_SIZE`` at a time while the response is sent, so
+neither the whole list of rows nor its serialized form is held in memory, and
+the first bytes go out before the last rows are read.
+"""
+from itertools import chain, islice
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def fast_json_settings():
+    options = {'BACKEND': 'auto', 'STREAM_THRESHOLD': 200, 'CHUNK_SIZE': 100}
+    options.update(getattr(settings, 'FAST_JSON', {}))
+    return options
+
+
+def use_orjson():
+    return orjson is not None and fast_json_settings()['BACKEND'] != 'stdlib'
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def __init__(self):
+        self.use_orjson = use_orjson()
+        self.encoder = self.encoder_class(
+            ensure_ascii=self.ensure_ascii, allow_nan=not self.strict, separators=(',', ':')
+        )
+
+    def is_fast(self, accepted_media_type, renderer_context):
+        # orjson only writes compact, UTF-8 output
+        return (
+            self.compact and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.is_fast(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return self.dumps(data)
+
+    def dumps(self, data):
+        if self.use_orjson:
+            try:
+                ret = orjson.dumps(
+                    data, default=self.encoder.default,
+                    option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+                )
+            except orjson.JSONEncodeError:
+                # e.g. integers wider than 64 bits; the stdlib handles them or raises the same way
+                ret = self.encoder.encode(data).encode()
+        else:
+            ret = self.encoder.encode(data).encode()
+
+        # Same JavaScript-safe escaping as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+    def stream_list(self, rows, serialize, chunk_size):
+        """Yield a JSON array of ``rows``, serializing and encoding ``chunk_size`` rows at a time."""
+        rows = iter(rows)
+        yield b'['
+        separator = b''
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield separator + self.dumps(serialize(chunk))[1:-1]
+            separator = b','
+        yield b']'
+
+
+class StreamingJSONMixin:
+    """
+    Streams unpaginated lists of more than ``STREAM_THRESHOLD`` rows (see the
+    module docstring). Paginated responses are bounded by the page size and
+    rendered as usual. List it after ``CompiledListMixin``, which passes its
+    ``values()`` rows to ``unpaginated_response``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return self.unpaginated_response(queryset, lambda rows: self.get_serializer(rows, many=True).data)
+
+    def unpaginated_response(self, rows, serialize):
+        """Response for a whole list; ``serialize(chunk)`` turns a list of rows into data."""
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        if not isinstance(renderer, FastJSONRenderer) or not renderer.is_fast(
+            self.request.accepted_media_type, self.get_renderer_context()
+        ):
+            return Response(serialize(rows))
+
+        options = fast_json_settings()
+        if hasattr(rows, 'iterator'):
+            rows = rows.iterator(chunk_size=options['CHUNK_SIZE'])
+        rows = iter(rows)
+        # Only lists that turn out to be long are streamed; no COUNT(*) is needed to know
+        head = list(islice(rows, options['STREAM_THRESHOLD'] + 1))
+        if len(head) <= options['STREAM_THRESHOLD']:
+            return Response(serialize(head))
+        return StreamingHttpResponse(
+            renderer.stream_list(chain(head, rows), serialize, options['CHUNK_SIZE']),
+            content_type=renderer.media_type,
+        )
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Passes the Prometheus text exposition through unchanged."""
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode()
+        return FastJSONRenderer().dumps(data)  # Errors (401 / 403) arrive as dicts
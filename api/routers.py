@@ -0,0 +1,161 @@
+"""
+Read-replica routing.
+
+Safe-method requests to views with ``use_replica = True`` read from one of the
+``DATABASE_REPLICAS`` aliases, picked once per request. Everything else reads
+from and writes to ``default``. Users read their own writes:
+
+* once a request writes (or opens a transaction on ``default``), its remaining
+  reads go to the primary;
+* after a request that wrote, the same client stays pinned to the primary for
+  ``REPLICA_ROUTING['PIN_SECONDS']``, which should cover the replication lag.
+  The pin is a signed, expiring cookie set on the write response, so it holds
+  whichever worker serves the next request. Clients that do not keep cookies
+  are also pinned by their Authorization header or session cookie in the
+  default cache; that pin only reaches other workers with a shared cache
+  backend (see api/caches.py).
+
+Code outside a request reads from the primary unless it opts in with
+``read_from_replica()``. Locally, ``DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3``
+plus the ``sync_replica`` command stand in for replication.
+"""
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+
+class RoutingState:
+
+    def __init__(self, replica=None):
+        self.replica = replica
+        self.wrote = False
+
+
+_state = ContextVar('replica_routing', default=None)
+
+
+def replica_routing_settings():
+    options = {'PIN_SECONDS': 5}
+    options.update(getattr(settings, 'REPLICA_ROUTING', {}))
+    return options
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def choose_replica():
+    replicas = replica_aliases()
+    return random.choice(replicas) if replicas else None
+
+
+@contextmanager
+def routing(replica):
+    outer = _state.get()
+    state = RoutingState(replica)
+    token = _state.set(state)
+    try:
+        yield
+    finally:
+        _state.reset(token)
+        if outer is not None and state.wrote:
+            outer.wrote = True
+
+
+def read_from_replica(alias=None):
+    """Send reads in the block to ``alias`` (or a random replica) until something writes."""
+    return routing(alias or choose_replica())
+
+
+def read_from_primary():
+    """Send reads in the block to ``default``, e.g. when filling a shared cache."""
+    return routing(DEFAULT_DB_ALIAS)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None:
+            return None
+        if state.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Read your own writes, including those of an open transaction
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication (or sync_replica)
+        if db in replica_aliases():
+            return False
+        return None
+
+
+PIN_COOKIE = 'replica_pin'
+
+
+def pin_key(request):
+    credentials = request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    return 'replica:pin:' + hashlib.sha256(credentials.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote or request.method not in SAFE_METHODS:
+            self.pin(request, response)
+        return response
+
+    def pin(self, request, response):
+        seconds = replica_routing_settings()['PIN_SECONDS']
+        response.set_signed_cookie(
+            PIN_COOKIE, '1', salt=PIN_COOKIE, max_age=seconds, httponly=True, samesite='Lax',
+            secure=request.is_secure(),
+        )
+        key = pin_key(request)
+        if key:
+            cache.set(key, True, seconds)
+
+    def is_pinned(self, request):
+        seconds = replica_routing_settings()['PIN_SECONDS']
+        if request.get_signed_cookie(PIN_COOKIE, default=None, salt=PIN_COOKIE, max_age=seconds):
+            return True
+        key = pin_key(request)
+        return bool(key and cache.get(key))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if request.method not in SAFE_METHODS or not getattr(view_class, 'use_replica', False):
+            return None
+        if self.is_pinned(request):
+            return None  # The client wrote recently
+        _state.get().replica = choose_replica()
+        return None
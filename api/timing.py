@@ -0,0 +1,220 @@
+"""
+Per-request timing instrumentation.
+
+``RequestTimingMiddleware`` records, for every request, the number of SQL
+queries and their total time (over all database aliases), the time spent in
+serializers and the time spent rendering the response, and sends them as a
+``Server-Timing`` header (shown in the browser's network panel)::
+
+    Server-Timing: db;dur=12.4;desc="7 queries", serialize;dur=3.1, render;dur=0.8, total;dur=19.6
+
+Serializer time excludes the SQL run while serializing (lazy relations), so
+the phases do not overlap. Requests slower than ``REQUEST_TIMING['SLOW_MS']``
+are logged with their slowest query and the line of project code that ran it.
+
+``cProfile`` profiles are written to ``REQUEST_TIMING['PROFILE_DIR']`` for one
+request in ``PROFILE_SAMPLE`` (0 disables sampling), and for any request that
+sends ``PROFILE_HEADER`` set to ``PROFILE_TOKEN`` (disabled while the token is
+empty). Open them with ``python -m pstats`` or snakeviz.
+"""
+import cProfile
+import hmac
+import itertools
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+
+logger = logging.getLogger(__name__)
+
+_state = ContextVar('request_timing', default=None)
+
+# Frames from these directories are skipped when looking for a query's call site
+LIBRARY_DIRS = tuple({os.path.dirname(os.__file__), *(path for path in sys.path if 'site-packages' in path)})
+
+
+def request_timing_settings():
+    options = {
+        'ENABLED': True,
+        'SLOW_MS': 500,
+        'PROFILE_SAMPLE': 0,
+        'PROFILE_HEADER': 'X-Profile',
+        'PROFILE_TOKEN': '',
+        'PROFILE_DIR': Path(settings.BASE_DIR) / 'var' / 'profiles',
+    }
+    options.update(getattr(settings, 'REQUEST_TIMING', {}))
+    return options
+
+
+class RequestTiming:
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.phases = {'serialize': 0.0, 'render': 0.0}
+        self.slowest = None  # (milliseconds, call site, sql)
+        self.depth = 0
+
+    def server_timing(self, total_ms):
+        entries = [f'db;dur={self.sql_ms:.1f};desc="{self.queries} queries"']
+        entries.extend(f'{name};dur={ms:.1f}' for name, ms in self.phases.items())
+        entries.append(f'total;dur={total_ms:.1f}')
+        return ', '.join(entries)
+
+
+def current_timing():
+    """The ``RequestTiming`` of the request being handled, or None."""
+    return _state.get()
+
+
+def call_site():
+    """``path:line (function)`` of the innermost frame outside the libraries and this module."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename != __file__ and not filename.startswith(LIBRARY_DIRS):
+            return f'{os.path.relpath(filename, settings.BASE_DIR)}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return 'unknown'
+
+
+def record_query(state):
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            state.queries += 1
+            state.sql_ms += ms
+            if state.slowest is None or ms > state.slowest[0]:
+                # Only the slowest query needs its call site, so the stack is walked rarely
+                state.slowest = (ms, call_site(), sql)
+    return wrapper
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block, less its SQL time, to ``phase`` of the current request."""
+    state = _state.get()
+    if state is None or state.depth:
+        # Outside a request, or nested in another timed block (e.g. serializer.data in a method field)
+        yield
+        return
+
+    state.depth += 1
+    sql_ms = state.sql_ms
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        state.depth -= 1
+        elapsed = (time.perf_counter() - start) * 1000 - (state.sql_ms - sql_ms)
+        state.phases[phase] = state.phases.get(phase, 0.0) + elapsed
+
+
+def instrument_serializers():
+    """Time every top-level ``serializer.data`` as the ``serialize`` phase."""
+    data = BaseSerializer.data
+    if getattr(data, 'timed', False):
+        return
+
+    def timed_data(self):
+        with timed('serialize'):
+            return data.fget(self)
+    timed_data.timed = True
+    BaseSerializer.data = property(timed_data)
+
+
+def profile_path(request):
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-{slug}-{os.getpid()}-{time.perf_counter_ns()}.prof'
+    return Path(request_timing_settings()['PROFILE_DIR']) / name
+
+
+class RequestTimingMiddleware:
+
+    def __init__(self, get_response):
+        options = request_timing_settings()
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.counter = itertools.count(1)
+        instrument_serializers()
+
+    def should_profile(self, request):
+        options = request_timing_settings()
+        token = options['PROFILE_TOKEN']
+        sent = request.headers.get(options['PROFILE_HEADER'])
+        if token and sent and hmac.compare_digest(sent, token):
+            return True
+        sample = options['PROFILE_SAMPLE']
+        return bool(sample) and next(self.counter) % sample == 0
+
+    def __call__(self, request):
+        state = RequestTiming()
+        token = _state.set(state)
+        profiler = cProfile.Profile() if self.should_profile(request) else None
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(record_query(state)))
+                if profiler is not None:
+                    try:
+                        profiler.enable()
+                    except ValueError:  # Another profiler is already running in this process
+                        profiler = None
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            _state.reset(token)
+
+        total_ms = (time.perf_counter() - start) * 1000
+        response['Server-Timing'] = state.server_timing(total_ms)
+        if profiler is not None:
+            self.save_profile(request, profiler)
+        if total_ms >= request_timing_settings()['SLOW_MS']:
+            self.log_slow(request, state, total_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before the response (a DRF Response included) is rendered
+        state = _state.get()
+        if state is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                state.phases['render'] += (time.perf_counter() - start) * 1000
+            response.add_post_render_callback(rendered)
+        return response
+
+    def save_profile(self, request, profiler):
+        path = profile_path(request)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(path)
+        except OSError:
+            logger.exception('Could not write the request profile to %s', path)
+        else:
+            logger.info('Profiled %s %s to %s', request.method, request.get_full_path(), path)
+
+    def log_slow(self, request, state, total_ms):
+        message = '%s %s took %.1f ms: %d queries in %.1f ms'
+        args = [request.method, request.get_full_path(), total_ms, state.queries, state.sql_ms]
+        if state.slowest is not None:
+            message += '; slowest %.1f ms at %s: %s'
+            args.extend(state.slowest)
+        logger.warning(message, *args)
@@ -0,0 +1,24 @@
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+from .authentication import MetricsTokenAuthentication
+from .metrics import exposition, registry
+from .renderers import PrometheusRenderer
+
+
+class CanScrapeMetrics(BasePermission):
+
+    def has_permission(self, request, view):
+        return request.auth == 'metrics' or bool(request.user and request.user.is_staff)
+
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint; see api/metrics.py."""
+    authentication_classes = [MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    permission_classes = [CanScrapeMetrics]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        counters, histograms = registry.collect()
+        return Response(exposition(counters, histograms), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,88 @@
+"""
+Representative requests against the main endpoints, shared by the
+``benchmark_requests`` and ``explain_queries`` commands.
+
+Ids and parameters are picked from the current data (the user owning the most
+projects, their busiest project, someone they message) so the queries have the
+shapes and selectivity of real traffic. Requests go through the full WSGI
+stack, middleware and connection handling included.
+
+Every route in Projects/urls.py and Users/urls.py is covered except those that
+write (registration, token, saving, bidding, marking read, subscribing), the
+admin-only cache stats and the long-lived event stream. The username lookup is
+a POST but only reads.
+"""
+import json
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from Projects.models import Project
+from Users.models import CustomUser, Message
+
+
+class Workload:
+
+    def __init__(self):
+        self.user = CustomUser.objects.annotate(project_total=Count('projects')).order_by('-project_total', 'id').first()
+        self.project = Project.objects.order_by('-bid_count', 'id').first()
+        if self.user is None or self.project is None:
+            raise ValueError('Representative requests need at least one project and one user in the database.')
+
+        self.other_user = (
+            Message.objects.filter(sender=self.user).values_list('receiver', flat=True).first()
+            or CustomUser.objects.exclude(pk=self.user.pk).values_list('pk', flat=True).first()
+            or self.user.pk
+        )
+        host = next((host for host in settings.ALLOWED_HOSTS if host and '*' not in host and not host.startswith('.')), 'localhost')
+        self.factory = RequestFactory(HTTP_HOST=host)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.handler = WSGIHandler()
+
+    def requests(self):
+        """``(label, method, path, parameters)`` for every endpoint, sent as ``self.user``."""
+        user, project = self.user, self.project
+        word = next(iter(project.title.split()), 'project')
+        return [
+            ('project list', 'get', reverse('project-list-create'), {}),
+            ('project list (keyset)', 'get', reverse('project-list-create'), {'cursor': ''}),
+            ('project list (filtered)', 'get', reverse('project-list-create'), {'project_type': 'freelancer', 'budget': '0-5000', 'proposals': '0-10'}),
+            ('project search', 'get', reverse('project-list-create'), {'search': word}),
+            ('project detail', 'get', reverse('project-detail', args=[project.id]), {}),
+            ('project bids', 'get', reverse('project-bids', args=[project.id]), {}),
+            ('user projects (open)', 'get', reverse('user-projects'), {'status': 'open'}),
+            ('user projects (in progress)', 'get', reverse('user-projects'), {'status': 'in_progress'}),
+            ('project matches', 'get', reverse('user-project-matches', args=[user.id]), {}),
+            ('saved projects', 'get', reverse('user-saved-projects', args=[user.id]), {}),
+            ('user bids (open)', 'get', reverse('user-bids-list'), {'status': 'open'}),
+            ('user bids', 'get', reverse('user-bids-list'), {}),
+            ('user list', 'get', reverse('customuser-list'), {}),
+            ('user detail', 'get', reverse('customuser-detail', args=[self.other_user]), {}),
+            ('username lookup', 'post', reverse('get_username'), {'email': user.email}),
+            ('current user', 'get', reverse('current-user'), {}),
+            ('notifications', 'get', reverse('user-notifications'), {'cursor': ''}),
+            ('notification count', 'get', reverse('notification-count'), {}),
+            ('transactions', 'get', reverse('user-transactions'), {'type': 'received', 'cursor': ''}),
+            ('transaction summary', 'get', reverse('user-transactions-summary'), {}),
+            ('contacts', 'get', reverse('user-contacts'), {}),
+            ('messages', 'get', reverse('user-messages'), {'other_user': self.other_user}),
+            ('conversations', 'get', reverse('user-conversations'), {'cursor': ''}),
+            ('subscribers', 'get', reverse('subscribe'), {}),
+        ]
+
+    def call(self, method, path, params):
+        """Send one request (GET query parameters or a JSON body) and return its status line."""
+        status = []
+        if method == 'get':
+            request = self.factory.get(path, params, **self.headers)
+        else:
+            request = self.factory.generic(method.upper(), path, json.dumps(params), 'application/json', **self.headers)
+        environ = request.environ
+        response = self.handler(environ, lambda line, response_headers, exc_info=None: status.append(line))
+        try:
+            b''.join(response)
+        finally:
+            response.close()  # request_finished: closes or keeps the connection per CONN_MAX_AGE
+        return status[0]
@@ -15,4 +15,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
 
 application = get_wsgi_application()
 
+# Write notifications left in the outbox by a crash or restart (NOTIFICATION_OUTBOX MODE 'thread')
+from Users.outbox import start_worker  # noqa: E402
+start_worker()
+
 app = application
\ No newline at end of file